@@ -2,18 +2,71 @@
 Application Configuration Settings
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     """Application settings from environment variables"""
 
     # Database
     DATABASE_URL: str  # Load ONLY from .env
+    ASYNC_DATABASE_URL: str = ""  # Derived from DATABASE_URL when empty
+    SQLITE_BUSY_TIMEOUT_SECONDS: float = 30.0  # SQLite writers wait this long for the lock instead of failing
 
     # JWT Settings
     SECRET_KEY: str = "digi-aata"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14  # sliding: each rotation extends the session by this much
+    REFRESH_TOKEN_MAX_LIFETIME_DAYS: int = 90  # absolute cap on a session, counted from login
+
+    # Password hashing: bcrypt cost factor and the bounded worker pool it runs on
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+
+    # Auth rate limits (token buckets: sustained rate per minute, burst size; a rate of 0 disables the limit)
+    LOGIN_RATE_PER_IP_PER_MINUTE: int = 20
+    LOGIN_BURST_PER_IP: int = 10
+    LOGIN_RATE_PER_ACCOUNT_PER_MINUTE: int = 5
+    LOGIN_BURST_PER_ACCOUNT: int = 5
+    REGISTER_RATE_PER_IP_PER_MINUTE: int = 5
+    REGISTER_BURST_PER_IP: int = 5
+    RATE_LIMIT_MAX_KEYS: int = 100000
+
+    # Guest carts (signed client-side tokens)
+    GUEST_CART_MAX_ITEMS: int = 50
+    GUEST_CART_MAX_QUANTITY: int = 99
+    GUEST_CART_TTL_DAYS: int = 30
+
+    # Cart stock reservations
+    CART_RESERVATION_TTL_MINUTES: int = 15
+    SWEEPER_INTERVAL_SECONDS: int = 60
+    SWEEPER_BATCH_SIZE: int = 500
+
+    # Shutdown waits this long for a background task to finish its current batch before cancelling it
+    BACKGROUND_STOP_TIMEOUT_SECONDS: float = 10.0
+
+    # Order numbers: "random" or "snowflake" (time-sortable; startup fails unless every
+    # host/replica sets its own ORDER_NUMBER_HOST_ID)
+    ORDER_NUMBER_GENERATOR: str = "random"
+    ORDER_NUMBER_HOST_ID: Optional[int] = None
+
+    # Idempotency-Key handling for order creation
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # an unfinished claim older than this may be taken over
+
+    # Outbox worker for post-commit side effects
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_LEASE_SECONDS: int = 60
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_SECONDS: float = 2.0
+    OUTBOX_MAX_BACKOFF_SECONDS: float = 600.0
+    OUTBOX_RETENTION_DAYS: int = 7
+
+    # Resolved-principal cache for bearer tokens (per process)
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 300
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
@@ -26,6 +79,14 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 5242880  # 5MB
     UPLOAD_DIR: str = "./uploads"
 
+    # Catalog response cache (per process)
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    CATALOG_CACHE_TTL_SECONDS: int = 60
+    CATALOG_HTTP_MAX_AGE: int = 0  # Cache-Control max-age for catalog responses
+
+    # Serialize hot list responses via precompiled TypeAdapters + orjson
+    FAST_JSON_RESPONSES: bool = False
+
     # Razorpay
     RAZORPAY_KEY_ID: str = ""
     RAZORPAY_KEY_SECRET: str = ""
@@ -2,7 +2,9 @@
 Database Configuration and Session Management
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 from app.config import settings
@@ -13,12 +15,32 @@ load_dotenv()
 # Read DB URL from settings (FastAPI config)
 DATABASE_URL = settings.DATABASE_URL
 
+def sqlite_connect_args(url: str) -> dict:
+    """SQLite connections wait for a busy database instead of raising 'database is locked'"""
+    if make_url(url).get_backend_name() != "sqlite":
+        return {}
+    return {"timeout": settings.SQLITE_BUSY_TIMEOUT_SECONDS}
+
+def enable_sqlite_wal(engine):
+    """Use WAL on SQLite so readers never block the (single) writer and vice versa"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_SECONDS * 1000)}")
+        cursor.close()
+
 # Create SQLAlchemy engine (PostgreSQL compatible)
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,       # automatically removes dead connections
-    future=True               # modern SQLAlchemy engine behavior
+    future=True,              # modern SQLAlchemy engine behavior
+    connect_args=sqlite_connect_args(DATABASE_URL),
 )
+enable_sqlite_wal(engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(
@@ -28,9 +50,62 @@ SessionLocal = sessionmaker(
     future=True
 )
 
+# Async drivers used by the request handlers
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+
+# Async engine for the (async def) route handlers, so queries never block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    connect_args=sqlite_connect_args(ASYNC_DATABASE_URL),
+)
+enable_sqlite_wal(async_engine.sync_engine)
+
+# Objects stay readable after commit; lazy loads are not allowed on AsyncSession
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class for models
 Base = declarative_base()
 
+def ensure_indexes(bind):
+    """Create any model index missing from an existing table (create_all skips tables that exist)"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+def ensure_columns(bind):
+    """Add any nullable model column missing from an existing table (create_all never alters tables)"""
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        quote = conn.dialect.identifier_preparer.quote
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    conn.execute(text(
+                        f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} "
+                        f"{column.type.compile(dialect=conn.dialect)}"
+                    ))
+
 # Dependency to get database session
 def get_db():
     """
@@ -43,4 +118,13 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get async database session
+async def get_async_db():
+    """
+    Async database session dependency
+    Usage in routes: db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 
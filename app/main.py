@@ -8,11 +8,19 @@ from fastapi.staticfiles import StaticFiles
 import os
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, ensure_indexes, ensure_columns
 from app.routers import auth, products, categories, cart, orders, admin
+from app.services.search import ensure_search_index
+from app.services.cart import ensure_cart_unique_index
+from app.services.sweeper import sweeper
+from app.services.outbox import outbox_worker
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+ensure_columns(engine)
+ensure_search_index(engine)
+ensure_cart_unique_index(engine)
+ensure_indexes(engine)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -36,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "X-Catalog-Version", "X-Guest-Cart", "Idempotent-Replayed"],
 )
 
 # Create uploads directory
@@ -53,6 +62,17 @@ app.include_router(cart.router, prefix="/api/cart", tags=["Cart"])
 app.include_router(orders.router, prefix="/api/orders", tags=["Orders"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start the expiry sweeper and the outbox worker"""
+    sweeper.start()
+    outbox_worker.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await sweeper.stop()
+    await outbox_worker.stop()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
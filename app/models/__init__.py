@@ -1,8 +1,10 @@
 """
 Import all models here for easy access
 """
-from app.models.user import User, Address
+from app.models.user import User, Address, RefreshToken
 from app.models.product import Product, Category
-from app.models.cart import CartItem, Order, OrderItem
+from app.models.cart import CartItem, StockReservation, Order, OrderItem
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import OutboxEvent
 
-__all__ = ["User", "Address", "Product", "Category", "CartItem", "Order", "OrderItem"]
+__all__ = ["User", "Address", "RefreshToken", "Product", "Category", "CartItem", "StockReservation", "Order", "OrderItem", "IdempotencyKey", "OutboxEvent"]
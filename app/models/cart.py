@@ -1,7 +1,7 @@
 """
 Cart and Order Models
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -19,10 +19,36 @@ class CartItem(Base):
     user = relationship("User", back_populates="cart_items")
     product = relationship("Product", back_populates="cart_items")
     
+    # One row per (user, product); adds upsert into it instead of racing to insert
+    __table_args__ = (
+        Index("uq_cart_items_user_product", "user_id", "product_id", unique=True),
+    )
+    
     def __repr__(self):
         return f"<CartItem user={self.user_id} product={self.product_id}>"
 
 
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # One hold per cart line; live holds are summed per product, the sweeper scans by expiry
+    __table_args__ = (
+        Index("uq_stock_reservations_user_product", "user_id", "product_id", unique=True),
+        Index("ix_stock_reservations_product_expires", "product_id", "expires_at", "quantity"),
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
+    
+    def __repr__(self):
+        return f"<StockReservation user={self.user_id} product={self.product_id} qty={self.quantity}>"
+
+
 class Order(Base):
     __tablename__ = "orders"
     
@@ -40,6 +66,15 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     
+    # The admin order grid seeks on (created_at, id), optionally after an
+    # equality filter on status, payment status or user
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_orders_payment_status_created_at_id", "payment_status", "created_at", "id"),
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Order {self.order_number}>"
 
@@ -57,5 +92,11 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items")
     
+    # Items are always fetched per order; per-product lookups serve sales and restock queries
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id", "id"),
+        Index("ix_order_items_product_id", "product_id"),
+    )
+    
     def __repr__(self):
         return f"<OrderItem order={self.order_id} product={self.product_id}>"
@@ -0,0 +1,27 @@
+"""
+Idempotency Key Model - the stored outcome of a client-keyed request
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text
+from app.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer)  # NULL while the first request is still running
+    response_body = Column(Text)
+    response_headers = Column(Text)  # JSON object of headers to re-send on replay
+    locked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    # One row per (user, key); the sweeper deletes by expiry
+    __table_args__ = (
+        Index("uq_idempotency_keys_user_key", "user_id", "key", unique=True),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+    
+    def __repr__(self):
+        return f"<IdempotencyKey user={self.user_id} key={self.key}>"
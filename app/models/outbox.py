@@ -0,0 +1,28 @@
+"""
+Outbox Model - side effects recorded in the same transaction as the change
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from datetime import datetime
+from app.database import Base
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), default="pending", nullable=False)  # pending, done, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    completed_handlers = Column(Text, default="", nullable=False)  # comma-separated handler names
+    last_error = Column(Text)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # next attempt / lease expiry
+    created_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime)
+    
+    # The worker claims due pending events in id order
+    __table_args__ = (
+        Index("ix_outbox_events_status_available_at", "status", "available_at", "id"),
+    )
+    
+    def __repr__(self):
+        return f"<OutboxEvent {self.id} {self.event_type} {self.status}>"
@@ -46,3 +46,19 @@ class Address(Base):
     
     def __repr__(self):
         return f"<Address {self.city}, {self.state}>"
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(32), unique=True, index=True, nullable=False)
+    family_id = Column(String(32), index=True, nullable=False)  # one family per login session
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)
+    replaced_by = Column(String(32))  # jti issued when this token was rotated
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<RefreshToken {self.jti} user={self.user_id}>"
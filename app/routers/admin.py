@@ -1,19 +1,33 @@
 """
 Admin Router - COMPLETE IMPLEMENTATION
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.cart import Order
 from app.routers.auth import get_current_user
-from app.schemas.cart import OrderResponse
+from app.services.principals import Principal, principal_cache
+from app.services.refresh_tokens import revoke_user_tokens
+from app.schemas.cart import OrderResponse, OrderStatusBulkUpdate
+from app.services.sweeper import sweeper
+from app.services.outbox import outbox_worker
+from app.services.order_export import export_query, export_csv, export_ndjson
+from app.services.order_filters import filter_orders
+from app.services.order_status import transition_orders
+from app.services.catalog_cache import catalog_cache, product_tags
+from app.utils.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
+from app.utils.serialization import json_response
 
 router = APIRouter()
 
-def check_admin(current_user: User = Depends(get_current_user)):
+def check_admin(current_user: Principal = Depends(get_current_user)):
     """Check if user is admin"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -21,30 +35,100 @@ def check_admin(current_user: User = Depends(get_current_user)):
 
 @router.get("/orders", response_model=List[OrderResponse])
 async def get_all_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(check_admin),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, description="Orders created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Orders created before this time"),
+    email: Optional[str] = Query(None, description="Orders placed by this user email"),
+    order_number: Optional[str] = None,
+    current_user: Principal = Depends(check_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all orders (admin only)"""
-    orders = db.query(Order).offset(skip).limit(limit).all()
-    return orders
+    """Get orders (admin only), filtered, oldest first; supports X-Next-Cursor paging"""
+    query = select(Order).options(selectinload(Order.order_items)).order_by(Order.created_at, Order.id)
+    query = filter_orders(
+        query, status=status, payment_status=payment_status, date_from=date_from,
+        date_to=date_to, email=email, order_number=order_number,
+    )
+    if cursor:
+        query = apply_keyset(query, Order.created_at, Order.id, cursor, "created_at")
+    else:
+        query = query.offset(skip)
+    
+    orders = (await db.scalars(query.limit(limit))).all()
+    
+    cursor_for_next = next_cursor(orders, limit, "created_at")
+    if cursor_for_next:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_for_next
+    return json_response(OrderResponse, orders, response)
+
+EXPORT_FORMATS = {
+    "csv": (export_csv, "text/csv"),
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+}
+
+@router.get("/orders/export")
+async def export_orders(
+    format: str = Query("csv", description="csv (one row per item) or ndjson (one order per line)"),
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, description="Orders created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Orders created before this time"),
+    email: Optional[str] = Query(None, description="Orders placed by this user email"),
+    order_number: Optional[str] = None,
+    current_user: Principal = Depends(check_admin)
+):
+    """Stream every matching order with its items (admin only)"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(EXPORT_FORMATS)}")
+    export, media_type = EXPORT_FORMATS[format]
+    filename = f"orders-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    return StreamingResponse(
+        export(export_query(
+            status=status, payment_status=payment_status, date_from=date_from,
+            date_to=date_to, email=email, order_number=order_number,
+        )),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+MAX_STATUS_BATCH = 5000
+
+@router.post("/orders/status")
+async def bulk_update_order_status(
+    update_data: OrderStatusBulkUpdate,
+    current_user: Principal = Depends(check_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Move many orders to one status in a single UPDATE; reports applied and rejected ids (admin only)"""
+    if len(update_data.order_ids) > MAX_STATUS_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STATUS_BATCH} orders per request")
+    result = await transition_orders(db, update_data.order_ids, update_data.status)
+    await db.commit()
+    if result["applied"]:
+        outbox_worker.notify()
+    if result["restocked_products"]:
+        catalog_cache.invalidate(*product_tags(result["restocked_products"]))
+    return result
 
 @router.get("/stats")
 async def get_stats(
-    current_user: User = Depends(check_admin),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(check_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get dashboard statistics (admin only)"""
     from app.models.product import Product
-    from sqlalchemy import func
     
-    total_users = db.query(func.count(User.id)).scalar()
-    total_products = db.query(func.count(Product.id)).scalar()
-    total_orders = db.query(func.count(Order.id)).scalar()
-    total_revenue = db.query(func.sum(Order.total_amount)).filter(
+    total_users = await db.scalar(select(func.count(User.id)))
+    total_products = await db.scalar(select(func.count(Product.id)))
+    total_orders = await db.scalar(select(func.count(Order.id)))
+    total_revenue = await db.scalar(select(func.sum(Order.total_amount)).filter(
         Order.payment_status == "completed"
-    ).scalar() or 0
+    )) or 0
     
     return {
         "total_users": total_users,
@@ -52,3 +136,39 @@ async def get_stats(
         "total_orders": total_orders,
         "total_revenue": float(total_revenue)
     }
+
+
+@router.post("/users/{user_id}/deactivate")
+async def deactivate_user(
+    user_id: int,
+    current_user: Principal = Depends(check_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Deactivate a user account and drop its cached sessions (admin only)"""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user.is_active = False
+    await revoke_user_tokens(db, user.id)
+    await db.commit()
+    principal_cache.invalidate_user(user.id)
+    return {"message": "User deactivated", "user_id": user_id}
+
+@router.get("/cache")
+async def get_cache_stats(current_user: Principal = Depends(check_admin)):
+    """Catalog cache hit/miss counters for this worker (admin only)"""
+    return catalog_cache.stats()
+
+@router.get("/sweeper")
+async def get_sweeper_stats(current_user: Principal = Depends(check_admin)):
+    """Background sweeper counters for this worker (admin only)"""
+    return sweeper.stats()
+
+@router.get("/outbox")
+async def get_outbox_metrics(
+    current_user: Principal = Depends(check_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Outbox queue depth and this worker's delivery counters (admin only)"""
+    return await outbox_worker.metrics(db)
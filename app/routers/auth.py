@@ -1,43 +1,55 @@
 """
 Authentication Router - COMPLETE IMPLEMENTATION
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token, UserUpdate
+from app.schemas.user import UserCreate, UserResponse, Token, UserUpdate, RefreshRequest
 from app.config import settings
+from app.services.guest_cart import GUEST_CART_HEADER, materialize_guest_cart, clear_guest_cart
+from app.services.passwords import password_hasher
+from app.services.principals import Principal, principal_cache
+from app.services.rate_limit import (
+    enforce, client_ip, login_ip_limiter, account_limiter, register_ip_limiter,
+)
+from app.services.refresh_tokens import (
+    InvalidRefreshToken, issue_refresh_token, rotate_refresh_token,
+    decode_refresh_token, revoke_family, revoke_user_tokens,
+)
 
 router = APIRouter()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password on the password worker pool"""
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    """Hash password"""
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    """Hash password on the password worker pool"""
+    return await password_hasher.hash(password)
 
 def create_access_token(data: dict) -> str:
-    """Create JWT token"""
+    """Create JWT token (sub = email, plus uid / role claims)"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get current user from token"""
+def token_claims(user: User) -> dict:
+    """Claims identifying user in an access token"""
+    return {"sub": user.email, "uid": user.id, "role": user.role}
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """Get current user from token, from the principal cache when possible"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -51,19 +63,36 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    
+    # Tokens issued before the uid claim existed only carry the email
+    user_id = payload.get("uid")
+    if user_id is not None:
+        user = await db.get(User, user_id)
+    else:
+        user = await db.scalar(select(User).filter(User.email == email))
+    if user is None or user.email != email or not user.is_active:
         raise credentials_exception
-    return user
+    
+    principal = Principal.from_user(user)
+    expires_in = payload["exp"] - datetime.now(timezone.utc).timestamp()
+    principal_cache.put(token, principal, expires_in)
+    return principal
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Register new user"""
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    enforce(
+        (register_ip_limiter, client_ip(request)),
+        (account_limiter, user_data.email.lower()),
+    )
+    existing_user = await db.scalar(select(User).filter(User.email == user_data.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     new_user = User(
         email=user_data.email,
         password_hash=hashed_password,
@@ -72,38 +101,94 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    """Login user"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login(
+    request: Request,
+    response: Response,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    guest_cart: Optional[str] = Header(None, alias=GUEST_CART_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Login user (merges an X-Guest-Cart into the user's cart)"""
+    enforce(
+        (login_ip_limiter, client_ip(request)),
+        (account_limiter, form_data.username.lower()),
+    )
+    user = await db.scalar(select(User).filter(User.email == form_data.username))
+    if not user or not await verify_password(form_data.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="Account is deactivated")
     
-    access_token = create_access_token(data={"sub": user.email})
-    return {"access_token": access_token, "token_type": "bearer"}
+    claims = token_claims(user)
+    refresh_token = await issue_refresh_token(db, claims)
+    await materialize_guest_cart(db, user.id, guest_cart)
+    await db.commit()
+    clear_guest_cart(response, guest_cart)
+    return {
+        "access_token": create_access_token(data=claims),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    try:
+        claims, refresh_token = await rotate_refresh_token(db, request.refresh_token)
+    except InvalidRefreshToken:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    return {
+        "access_token": create_access_token(data=claims),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Revoke the session (refresh token family) the given refresh token belongs to"""
+    try:
+        payload = decode_refresh_token(request.refresh_token)
+    except InvalidRefreshToken:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    await revoke_family(db, payload["fam"])
+    return None
+
+@router.post("/revoke-all", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_all_sessions(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revoke every refresh token of the current user (log out everywhere)"""
+    await revoke_user_tokens(db, current_user.id)
+    await db.commit()
+    principal_cache.invalidate_user(current_user.id)
+    return None
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: Principal = Depends(get_current_user)):
     """Get current user"""
     return current_user
 
 @router.put("/me", response_model=UserResponse)
 async def update_me(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user"""
+    user = await db.get(User, current_user.id)
     if user_update.full_name is not None:
-        current_user.full_name = user_update.full_name
+        user.full_name = user_update.full_name
     if user_update.phone is not None:
-        current_user.phone = user_update.phone
+        user.phone = user_update.phone
     
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate_user(user.id)
+    return user
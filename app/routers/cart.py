@@ -1,119 +1,210 @@
 """
 Cart Router - COMPLETE IMPLEMENTATION
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.cart import CartItem
-from app.models.product import Product
-from app.models.user import User
-from app.schemas.cart import CartItemCreate, CartItemUpdate, CartItemResponse
+from app.schemas.cart import (
+    CartItemCreate, CartItemUpdate, CartItemResponse, CartBulkRequest, CartSummaryResponse,
+    GuestCartResponse,
+)
 from app.routers.auth import get_current_user
+from app.services.principals import Principal
+from app.services.cart import cart_summary, merge_quantities, validate_stock, upsert_cart_items
+from app.services.reservations import sync_reservations, release_reservations
+from app.services.guest_cart import (
+    GUEST_CART_HEADER, read_guest_cart, check_guest_cart, guest_cart_summary, materialize_guest_cart,
+    clear_guest_cart,
+)
 
 router = APIRouter()
 
+# Most distinct products accepted by one bulk add
+MAX_BULK_ITEMS = 100
+
 @router.get("/", response_model=List[CartItemResponse])
 async def get_cart(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's cart"""
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
+    cart_items = (await db.scalars(select(CartItem).filter(CartItem.user_id == current_user.id))).all()
     return cart_items
 
 @router.post("/items", response_model=CartItemResponse, status_code=status.HTTP_201_CREATED)
 async def add_to_cart(
     item: CartItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add item to cart"""
-    product = db.query(Product).filter(Product.id == item.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    if product.stock_quantity < item.quantity:
-        raise HTTPException(status_code=400, detail="Insufficient stock")
+    quantities = merge_quantities([item])
+    await validate_stock(db, current_user.id, quantities)
+    await upsert_cart_items(db, current_user.id, quantities)
+    await db.commit()
     
-    existing_item = db.query(CartItem).filter(
+    return await db.scalar(select(CartItem).filter(
         CartItem.user_id == current_user.id,
         CartItem.product_id == item.product_id
-    ).first()
-    
-    if existing_item:
-        existing_item.quantity += item.quantity
-        db.commit()
-        db.refresh(existing_item)
-        return existing_item
+    ))
+
+@router.post("/items/bulk", response_model=CartSummaryResponse)
+async def add_to_cart_bulk(
+    payload: CartBulkRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Add several items in one transaction (also used to merge a guest cart at login)"""
+    quantities = merge_quantities(payload.items)
+    if not quantities:
+        raise HTTPException(status_code=400, detail="No items to add")
+    if len(quantities) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} products per request")
     
-    cart_item = CartItem(
-        user_id=current_user.id,
-        product_id=item.product_id,
-        quantity=item.quantity
-    )
-    db.add(cart_item)
-    db.commit()
-    db.refresh(cart_item)
-    return cart_item
+    await validate_stock(db, current_user.id, quantities)
+    await upsert_cart_items(db, current_user.id, quantities)
+    await db.commit()
+    return await cart_summary(db, current_user.id)
 
 @router.put("/items/{item_id}", response_model=CartItemResponse)
 async def update_cart_item(
     item_id: int,
     item_update: CartItemUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update cart item quantity"""
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).filter(
         CartItem.id == item_id,
         CartItem.user_id == current_user.id
-    ).first()
+    ))
     
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
-    product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-    if product.stock_quantity < item_update.quantity:
-        raise HTTPException(status_code=400, detail="Insufficient stock")
+    if item_update.quantity < 1:
+        raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+    await validate_stock(db, current_user.id, {cart_item.product_id: item_update.quantity}, replace=True)
     
     cart_item.quantity = item_update.quantity
-    db.commit()
-    db.refresh(cart_item)
+    await db.flush()
+    await sync_reservations(db, current_user.id, [cart_item.product_id])
+    await db.commit()
+    await db.refresh(cart_item)
     return cart_item
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_from_cart(
     item_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove item from cart"""
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).filter(
         CartItem.id == item_id,
         CartItem.user_id == current_user.id
-    ).first()
+    ))
     
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
-    db.delete(cart_item)
-    db.commit()
+    await db.delete(cart_item)
+    await release_reservations(db, current_user.id, [cart_item.product_id])
+    await db.commit()
     return None
 
+@router.get("/summary", response_model=CartSummaryResponse)
+async def get_cart_summary(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Cart lines with product details, line totals and grand total"""
+    return await cart_summary(db, current_user.id)
+
 @router.get("/total")
 async def get_cart_total(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate cart total"""
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    
-    total = 0
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            total += product.price * item.quantity
-    
-    return {"total": total, "item_count": len(cart_items)}
+    summary = await cart_summary(db, current_user.id)
+    return {"total": summary["total"], "item_count": summary["item_count"]}
+
+
+@router.post("/merge", response_model=CartSummaryResponse)
+async def merge_guest_cart(
+    response: Response,
+    guest_cart: Optional[str] = Header(None, alias=GUEST_CART_HEADER),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Move a guest cart into the user's cart (clamped to stock; merging twice changes nothing)"""
+    read_guest_cart(guest_cart)
+    await materialize_guest_cart(db, current_user.id, guest_cart)
+    await db.commit()
+    clear_guest_cart(response, guest_cart)
+    return await cart_summary(db, current_user.id)
+
+async def guest_cart_response(db: AsyncSession, quantities, response: Response, strict: bool = False):
+    """Price the guest cart and hand the re-signed token back in body and header"""
+    summary = await guest_cart_summary(db, quantities, strict=strict)
+    response.headers[GUEST_CART_HEADER] = summary["token"]
+    return summary
+
+@router.get("/guest", response_model=GuestCartResponse)
+async def get_guest_cart(
+    response: Response,
+    guest_cart: Optional[str] = Header(None, alias=GUEST_CART_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get an anonymous shopper's cart from its signed token"""
+    return await guest_cart_response(db, read_guest_cart(guest_cart), response)
+
+@router.post("/guest/items", response_model=GuestCartResponse)
+async def add_to_guest_cart(
+    payload: CartBulkRequest,
+    response: Response,
+    guest_cart: Optional[str] = Header(None, alias=GUEST_CART_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Add items to a guest cart; returns the new token"""
+    quantities = read_guest_cart(guest_cart)
+    for product_id, quantity in merge_quantities(payload.items).items():
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    check_guest_cart(quantities)
+    return await guest_cart_response(db, quantities, response, strict=True)
+
+@router.put("/guest/items/{product_id}", response_model=GuestCartResponse)
+async def update_guest_cart_item(
+    product_id: int,
+    item_update: CartItemUpdate,
+    response: Response,
+    guest_cart: Optional[str] = Header(None, alias=GUEST_CART_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Set a guest cart line's quantity (0 removes it)"""
+    quantities = read_guest_cart(guest_cart)
+    if item_update.quantity < 0:
+        raise HTTPException(status_code=400, detail="Quantity cannot be negative")
+    if item_update.quantity == 0:
+        quantities.pop(product_id, None)
+    else:
+        quantities[product_id] = item_update.quantity
+    check_guest_cart(quantities)
+    return await guest_cart_response(db, quantities, response, strict=True)
+
+@router.delete("/guest/items/{product_id}", response_model=GuestCartResponse)
+async def remove_from_guest_cart(
+    product_id: int,
+    response: Response,
+    guest_cart: Optional[str] = Header(None, alias=GUEST_CART_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Remove a product from a guest cart"""
+    quantities = read_guest_cart(guest_cart)
+    quantities.pop(product_id, None)
+    return await guest_cart_response(db, quantities, response)
@@ -1,50 +1,92 @@
 """
 Categories Router - COMPLETE IMPLEMENTATION
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.product import Category, Product
-from app.schemas.product import CategoryResponse, CategoryCreate, ProductResponse
+from app.schemas.product import CategoryResponse, CategoryCreate
 from app.routers.auth import get_current_user
-from app.models.user import User
+from app.services.principals import Principal
+from app.services.catalog_cache import catalog_cache, cache_key, product_tags
+from app.services.projection import (
+    parse_fields, product_load_options, product_schema, SPARSE_PRODUCT_LIST, FIELDS_DESCRIPTION,
+)
 
 router = APIRouter()
 
 @router.get("/", response_model=List[CategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all categories"""
-    categories = db.query(Category).all()
-    return categories
+    key = cache_key("categories")
+    cached = catalog_cache.get(key)
+    if cached:
+        return cached.to_response(request)
+    version = catalog_cache.version
+    
+    categories = (await db.scalars(select(Category))).all()
+    entry = catalog_cache.put(
+        key,
+        categories,
+        schema=CategoryResponse,
+        tags={"categories"},
+        version=version,
+    )
+    return entry.to_response(request, hit=False)
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int, db: Session = Depends(get_db)):
+async def get_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get single category"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
-@router.get("/{category_id}/products", response_model=List[ProductResponse])
-async def get_category_products(category_id: int, db: Session = Depends(get_db)):
-    """Get all products in a category"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+@router.get("/{category_id}/products", response_model=SPARSE_PRODUCT_LIST)
+async def get_category_products(
+    category_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get all products in a category, optionally only the listed `fields`"""
+    field_set = parse_fields(fields)
+    key = cache_key(
+        f"categories/{category_id}/products",
+        fields=",".join(field_set) if field_set else None,
+    )
+    cached = catalog_cache.get(key)
+    if cached:
+        return cached.to_response(request)
+    version = catalog_cache.version
+    
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    products = db.query(Product).filter(
-        Product.category_id == category_id,
-        Product.is_active == True
-    ).all()
-    return products
+    products = (await db.scalars(
+        select(Product).options(*product_load_options(field_set)).filter(
+            Product.category_id == category_id,
+            Product.is_active == True
+        )
+    )).all()
+    entry = catalog_cache.put(
+        key,
+        products,
+        schema=product_schema(field_set),
+        tags={f"category:{category_id}"} | product_tags(product.id for product in products),
+        version=version,
+    )
+    return entry.to_response(request, hit=False)
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category: CategoryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create category (admin only)"""
     if current_user.role != "admin":
@@ -52,6 +94,7 @@ async def create_category(
     
     new_category = Category(**category.model_dump())
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
+    catalog_cache.invalidate("categories")
     return new_category
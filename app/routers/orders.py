@@ -1,49 +1,56 @@
 """
 Orders Router - COMPLETE IMPLEMENTATION
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
+from sqlalchemy import select, delete, update, insert, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.cart import Order, OrderItem, CartItem
 from app.models.product import Product
-from app.models.user import User
 from app.schemas.cart import OrderCreate, OrderResponse
 from app.routers.auth import get_current_user
+from app.services.principals import Principal
+from app.services.catalog_cache import catalog_cache, product_tags
+from app.services.guest_cart import GUEST_CART_HEADER, materialize_guest_cart, clear_guest_cart
+from app.services.idempotency import (
+    IDEMPOTENCY_HEADER, request_fingerprint, claim_idempotency_key,
+    complete_idempotency_key, release_idempotency_key,
+)
+from app.services.order_numbers import order_number_generator
+from app.services.order_status import transition_orders
+from app.services.outbox import enqueue, outbox_worker
+from app.services.reservations import checkout_lines, release_reservations
+from app.utils.serialization import json_response
 
 router = APIRouter()
 
 def generate_order_number():
     """Generate unique order number"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    return f"ORD{timestamp}"
+    return order_number_generator()
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(
-    order_data: OrderCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Create order from cart"""
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
+async def place_order(db: AsyncSession, user_id: int, order_data: OrderCreate, guest_cart: Optional[str]) -> Order:
+    """Turn the user's cart (plus any guest cart) into an order with its items loaded; caller commits"""
+    await materialize_guest_cart(db, user_id, guest_cart)
+    lines = await checkout_lines(db, user_id, lock=True)
     
-    if not cart_items:
+    if not lines:
         raise HTTPException(status_code=400, detail="Cart is empty")
     
     total_amount = 0
     order_items_data = []
     
-    for cart_item in cart_items:
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Product {cart_item.product_id} not found")
-        
-        if product.stock_quantity < cart_item.quantity:
+    for cart_item, product, held, reserved_by_others in lines:
+        # A live hold covering the line already set the stock aside; otherwise
+        # the line may only use what other shoppers' holds leave available
+        available = product.stock_quantity
+        if held < cart_item.quantity:
+            available -= reserved_by_others
+        if available < cart_item.quantity:
             raise HTTPException(
-                status_code=400,
+                status_code=status.HTTP_409_CONFLICT,
                 detail=f"Insufficient stock for {product.name}"
             )
         
@@ -57,7 +64,7 @@ async def create_order(
         })
     
     order = Order(
-        user_id=current_user.id,
+        user_id=user_id,
         order_number=generate_order_number(),
         total_amount=total_amount,
         shipping_address_id=order_data.shipping_address_id,
@@ -67,44 +74,101 @@ async def create_order(
     )
     
     db.add(order)
-    db.flush()
+    await db.flush()
     
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            order_id=order.id,
-            **item_data
-        )
-        db.add(order_item)
-        
-        product = db.query(Product).filter(Product.id == item_data["product_id"]).first()
-        product.stock_quantity -= item_data["quantity"]
+    # One conditional UPDATE decrements every line; a short row count means a
+    # concurrent checkout took the stock first, and the whole order rolls back
+    quantities = {item["product_id"]: item["quantity"] for item in order_items_data}
+    ordered = case(quantities, value=Product.id)
+    result = await db.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock_quantity >= ordered)
+        .values(stock_quantity=Product.stock_quantity - ordered)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(quantities):
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Stock changed during checkout, please review your cart")
     
-    db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
+    await db.execute(insert(OrderItem), [{"order_id": order.id, **item} for item in order_items_data])
     
-    db.commit()
-    db.refresh(order)
+    # Stock now reflects the sold units, so their holds are converted by dropping them
+    await db.execute(delete(CartItem).filter(CartItem.user_id == user_id))
+    await release_reservations(db, user_id)
+    
+    # Emails, invoices, payment capture etc. run from the outbox after commit
+    enqueue(db, "order.created", {
+        "order_id": order.id,
+        "order_number": order.order_number,
+        "user_id": user_id,
+        "total_amount": total_amount,
+        "payment_method": order.payment_method,
+    })
+    await db.refresh(order, ["order_items"])
     return order
 
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    order_data: OrderCreate,
+    guest_cart: Optional[str] = Header(None, alias=GUEST_CART_HEADER),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create order from cart (plus any X-Guest-Cart); retries with the same Idempotency-Key replay the result"""
+    if idempotency_key is not None:
+        fingerprint = request_fingerprint(order_data.model_dump_json(), guest_cart)
+        replay = await claim_idempotency_key(db, current_user.id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+    
+    try:
+        order = await place_order(db, current_user.id, order_data, guest_cart)
+        body = OrderResponse.model_validate(order).model_dump_json()
+        response = Response(content=body, status_code=status.HTTP_201_CREATED, media_type="application/json")
+        clear_guest_cart(response, guest_cart)
+        if idempotency_key is not None:
+            # A replay must also tell the client to drop its guest cart
+            replay_headers = {
+                name: response.headers[name] for name in (GUEST_CART_HEADER,) if name in response.headers
+            }
+            await complete_idempotency_key(
+                db, current_user.id, idempotency_key, status.HTTP_201_CREATED, body, replay_headers,
+            )
+        await db.commit()
+    except Exception:
+        if idempotency_key is not None:
+            await release_idempotency_key(db, current_user.id, idempotency_key)
+        raise
+    
+    catalog_cache.invalidate(*product_tags(item.product_id for item in order.order_items))
+    outbox_worker.notify()
+    return response
+
 @router.get("/", response_model=List[OrderResponse])
 async def get_orders(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's orders"""
-    orders = db.query(Order).filter(Order.user_id == current_user.id).all()
-    return orders
+    orders = (await db.scalars(
+        select(Order).options(selectinload(Order.order_items))
+        .filter(Order.user_id == current_user.id)
+        .order_by(Order.created_at, Order.id)
+    )).all()
+    return json_response(OrderResponse, orders)
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get single order"""
-    order = db.query(Order).filter(
+    order = await db.scalar(select(Order).options(selectinload(Order.order_items)).filter(
         Order.id == order_id,
         Order.user_id == current_user.id
-    ).first()
+    ))
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -115,18 +179,22 @@ async def get_order(
 async def update_order_status(
     order_id: int,
     status: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update order status (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    order.status = status
-    db.commit()
+    result = await transition_orders(db, [order_id], status)
+    if result["rejected"]:
+        reason = result["rejected"][0]["reason"]
+        if reason == "not found":
+            raise HTTPException(status_code=404, detail="Order not found")
+        raise HTTPException(status_code=409, detail=f"Invalid status transition: {reason}")
+    await db.commit()
+    outbox_worker.notify()
+    if result["restocked_products"]:
+        catalog_cache.invalidate(*product_tags(result["restocked_products"]))
     
     return {"message": "Order status updated", "order_id": order_id, "status": status}
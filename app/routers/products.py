@@ -1,36 +1,56 @@
 """
 Products Router - COMPLETE IMPLEMENTATION
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional, Literal
+import json
 
-from app.database import get_db
-from app.models.product import Product
-from app.schemas.product import ProductResponse, ProductCreate, ProductUpdate
+from app.database import get_async_db
+from app.models.product import Product, Category
+from app.schemas.product import (
+    ProductResponse, ProductCreate, ProductUpdate, ProductFacets, ProductBatchResponse,
+)
 from app.routers.auth import get_current_user
-from app.models.user import User
+from app.services.principals import Principal
+from app.services.catalog_cache import catalog_cache, cache_key, product_tags, invalidate_product_change, LISTING_FIELDS
+from app.services.projection import (
+    parse_fields, product_load_options, product_schema, SPARSE_PRODUCT_LIST, FIELDS_DESCRIPTION,
+)
+from app.services.search import search_products, index_product, remove_product
+from app.utils.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ProductResponse])
-async def get_products(
-    skip: int = 0,
-    limit: int = 100,
+# Most ids accepted by one batch lookup
+MAX_BATCH_IDS = 100
+
+# Price facet buckets as (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ("under-250", 0, 250),
+    ("250-500", 250, 500),
+    ("500-1000", 500, 1000),
+    ("1000-plus", 1000, None),
+]
+
+def filter_products(
+    db: AsyncSession,
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    db: Session = Depends(get_db)
 ):
-    """Get all products with filters"""
-    query = db.query(Product).filter(Product.is_active == True)
+    """Active products matching the listing filters, plus the search rank order (or None)"""
+    query = select(Product).filter(Product.is_active == True)
     
     if category_id:
         query = query.filter(Product.category_id == category_id)
     
+    rank_order = None
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        query, rank_order = search_products(db, query, search)
     
     if min_price:
         query = query.filter(Product.price >= min_price)
@@ -38,22 +58,193 @@ async def get_products(
     if max_price:
         query = query.filter(Product.price <= max_price)
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    return query, rank_order
+
+@router.get("/", response_model=SPARSE_PRODUCT_LIST)
+async def get_products(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: Optional[Literal["created_at", "price"]] = None,
+    category_id: Optional[int] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all products with filters
+
+    Pass the X-Next-Cursor header of a page back as `cursor` to seek to the
+    next one on (sort, id); `skip` is ignored in cursor mode. Search results
+    are ranked by relevance unless an explicit `sort` is given. `fields`
+    returns (and loads) only the listed fields.
+    """
+    search = " ".join(search.lower().split()) if search else None
+    field_set = parse_fields(fields)
+    key = cache_key(
+        "products", skip=None if cursor else skip, limit=limit, cursor=cursor, sort=sort,
+        category_id=category_id, search=search, min_price=min_price, max_price=max_price,
+        fields=",".join(field_set) if field_set else None,
+    )
+    cached = catalog_cache.get(key)
+    if cached:
+        return cached.to_response(request)
+    version = catalog_cache.version
+    
+    query, rank_order = filter_products(db, category_id, search, min_price, max_price)
+    
+    headers = {}
+    if rank_order is not None and sort is None and not cursor:
+        query = query.order_by(rank_order, Product.id).offset(skip)
+        query = query.options(*product_load_options(field_set))
+        products = (await db.scalars(query.limit(limit))).all()
+    else:
+        sort = sort or "created_at"
+        sort_column = getattr(Product, sort)
+        query = query.order_by(sort_column, Product.id)
+        if cursor:
+            query = apply_keyset(query, sort_column, Product.id, cursor, sort)
+        else:
+            query = query.offset(skip)
+        
+        query = query.options(*product_load_options(field_set, sort_column))
+        products = (await db.scalars(query.limit(limit))).all()
+        
+        cursor_for_next = next_cursor(products, limit, sort)
+        if cursor_for_next:
+            headers[NEXT_CURSOR_HEADER] = cursor_for_next
+    
+    entry = catalog_cache.put(
+        key,
+        products,
+        schema=product_schema(field_set),
+        tags={"products"} | product_tags(product.id for product in products),
+        version=version,
+        headers=headers,
+    )
+    return entry.to_response(request, hit=False)
+
+@router.get("/facets", response_model=ProductFacets)
+async def get_product_facets(
+    request: Request,
+    category_id: Optional[int] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Category, age group and price bucket counts for the given listing filters"""
+    search = " ".join(search.lower().split()) if search else None
+    key = cache_key(
+        "products/facets", category_id=category_id, search=search,
+        min_price=min_price, max_price=max_price,
+    )
+    cached = catalog_cache.get(key)
+    if cached:
+        return cached.to_response(request)
+    version = catalog_cache.version
+    
+    query, _ = filter_products(db, category_id, search, min_price, max_price)
+    price_bucket = case(
+        *[(Product.price < upper, label) for label, _, upper in PRICE_BUCKETS if upper is not None],
+        else_=PRICE_BUCKETS[-1][0],
+    ).label("price_bucket")
+    rows = (await db.execute(
+        query.outerjoin(Category, Category.id == Product.category_id)
+        .with_only_columns(
+            Product.category_id, Category.name, Product.age_group, price_bucket,
+            func.count(Product.id),
+        )
+        .group_by(Product.category_id, Category.name, Product.age_group, price_bucket)
+    )).all()
+    
+    categories, age_groups, buckets = {}, {}, {label: 0 for label, _, _ in PRICE_BUCKETS}
+    for cat_id, cat_name, age_group, bucket, count in rows:
+        categories.setdefault(cat_id, {"id": cat_id, "name": cat_name, "count": 0})["count"] += count
+        age_groups[age_group] = age_groups.get(age_group, 0) + count
+        buckets[bucket] += count
+    
+    facets = ProductFacets(
+        total=sum(buckets.values()),
+        categories=sorted(categories.values(), key=lambda facet: -facet["count"]),
+        age_groups=[
+            {"value": value, "count": count}
+            for value, count in sorted(age_groups.items(), key=lambda item: -item[1])
+        ],
+        price_buckets=[
+            {"label": label, "min": lower, "max": upper, "count": buckets[label]}
+            for label, lower, upper in PRICE_BUCKETS
+        ],
+    )
+    entry = catalog_cache.put(key, facets, tags={"facets"}, version=version)
+    return entry.to_response(request, hit=False)
+
+def cache_product(product: Product, version: int):
+    """Cache the single-product response body for product, read at catalog version"""
+    return catalog_cache.put(
+        cache_key(f"products/{product.id}"),
+        product,
+        schema=ProductResponse,
+        tags=product_tags([product.id]),
+        version=version,
+    )
+
+@router.get("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids, e.g. 1,2,3"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get several products in one call, in the requested order, reporting unknown ids"""
+    try:
+        product_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(product_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    
+    bodies = {}
+    for product_id in product_ids:
+        cached = catalog_cache.get(cache_key(f"products/{product_id}"))
+        if cached:
+            bodies[product_id] = cached.body
+    
+    to_fetch = [product_id for product_id in product_ids if product_id not in bodies]
+    if to_fetch:
+        version = catalog_cache.version
+        products = await db.scalars(
+            select(Product).options(selectinload(Product.category)).filter(Product.id.in_(to_fetch))
+        )
+        for product in products:
+            bodies[product.id] = cache_product(product, version).body
+    
+    # Splice the cached per-product JSON bodies instead of re-serializing them
+    missing = [product_id for product_id in product_ids if product_id not in bodies]
+    items = b",".join(bodies[product_id] for product_id in product_ids if product_id in bodies)
+    content = b'{"items":[' + items + b'],"missing":' + json.dumps(missing).encode() + b"}"
+    return Response(content=content, media_type="application/json")
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get single product"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    cached = catalog_cache.get(cache_key(f"products/{product_id}"))
+    if cached:
+        return cached.to_response(request)
+    version = catalog_cache.version
+    
+    product = await db.get(Product, product_id, options=[selectinload(Product.category)])
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    
+    return cache_product(product, version).to_response(request, hit=False)
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create product (admin only)"""
     if current_user.role != "admin":
@@ -61,46 +252,56 @@ async def create_product(
     
     new_product = Product(**product.model_dump())
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    await db.flush()
+    await index_product(db, new_product.id)
+    await db.commit()
+    await db.refresh(new_product, ["category"])
+    invalidate_product_change(new_product, LISTING_FIELDS)
     return new_product
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_update: ProductUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update product (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    for key, value in product_update.model_dump(exclude_unset=True).items():
+    old_category_id = product.category_id
+    changes = product_update.model_dump(exclude_unset=True)
+    for key, value in changes.items():
         setattr(product, key, value)
     
-    db.commit()
-    db.refresh(product)
+    await db.flush()
+    await index_product(db, product.id)
+    await db.commit()
+    await db.refresh(product, ["category"])
+    invalidate_product_change(product, changes.keys(), old_category_id)
     return product
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete product (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    db.delete(product)
-    db.commit()
+    await remove_product(db, product.id)
+    await db.delete(product)
+    await db.commit()
+    invalidate_product_change(product, LISTING_FIELDS)
     return None
@@ -12,6 +12,13 @@ class CartItemBase(BaseModel):
 class CartItemCreate(CartItemBase):
     pass
 
+class CartBulkRequest(BaseModel):
+    items: List[CartItemCreate]
+
+class OrderStatusBulkUpdate(BaseModel):
+    order_ids: List[int]
+    status: str
+
 class CartItemUpdate(BaseModel):
     quantity: int
 
@@ -23,6 +30,32 @@ class CartItemResponse(CartItemBase):
     class Config:
         from_attributes = True
 
+class GuestCartLineResponse(BaseModel):
+    product_id: int
+    quantity: int
+    name: str
+    price: float
+    image_url: Optional[str] = None
+    stock_quantity: int
+    line_total: float
+
+class CartLineResponse(GuestCartLineResponse):
+    id: int
+    created_at: datetime
+
+class CartSummaryResponse(BaseModel):
+    items: List[CartLineResponse] = []
+    total: float
+    item_count: int
+    total_quantity: int
+
+class GuestCartResponse(BaseModel):
+    items: List[GuestCartLineResponse] = []
+    total: float
+    item_count: int
+    total_quantity: int
+    token: str
+
 class OrderItemBase(BaseModel):
     product_id: int
     quantity: int
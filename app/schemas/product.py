@@ -2,7 +2,7 @@
 Product and Category Pydantic Schemas
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 class CategoryBase(BaseModel):
@@ -51,3 +51,42 @@ class ProductResponse(ProductBase):
     
     class Config:
         from_attributes = True
+
+class ProductFieldsResponse(BaseModel):
+    """A product trimmed to the fields named in ?fields=; unrequested fields are absent"""
+    id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    category_id: Optional[int] = None
+    age_group: Optional[str] = None
+    stock_quantity: Optional[int] = None
+    image_url: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    category: Optional[CategoryResponse] = None
+
+class ProductBatchResponse(BaseModel):
+    items: List[ProductResponse]
+    missing: List[int]
+
+class CategoryFacet(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+
+class AgeGroupFacet(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class PriceBucketFacet(BaseModel):
+    label: str
+    min: float
+    max: Optional[float] = None
+    count: int
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    age_groups: List[AgeGroupFacet]
+    price_buckets: List[PriceBucketFacet]
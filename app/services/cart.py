@@ -0,0 +1,170 @@
+"""
+Cart Queries
+
+The cart page needs every line with its product details plus the totals.
+One SELECT joins cart_items to products and computes line totals, the grand
+total and the counts with window aggregates, so the whole summary costs a
+single round trip regardless of cart size.
+
+Adding items is a set operation: one SELECT validates stock for the whole
+batch, then one INSERT ... ON CONFLICT DO UPDATE on (user_id, product_id)
+adds the quantities, so concurrent adds can never create duplicate rows.
+Stock is checked against what other shoppers' live reservations leave
+available, and every cart write refreshes the user's own reservations.
+"""
+from typing import Dict, Iterable
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, and_, text, inspect, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cart import CartItem
+from app.models.product import Product
+from app.services.reservations import live_reservations, sync_reservations
+from app.utils.db import dialect_insert
+
+
+CART_UNIQUE_INDEX = "uq_cart_items_user_product"
+
+
+def ensure_cart_unique_index(engine):
+    """
+    One-off upgrade for tables created before the unique index upserts rely on:
+    fold duplicate (user, product) rows together, then create the index.
+    A no-op once the index exists, so it costs one catalog lookup per boot.
+    """
+    with engine.begin() as conn:
+        indexes = inspect(conn).get_indexes(CartItem.__tablename__)
+        if any(index["name"] == CART_UNIQUE_INDEX for index in indexes):
+            return
+        conn.execute(text("""
+            UPDATE cart_items SET quantity = (
+                SELECT SUM(d.quantity) FROM cart_items AS d
+                WHERE d.user_id = cart_items.user_id AND d.product_id = cart_items.product_id
+            )
+            WHERE id IN (
+                SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id HAVING COUNT(*) > 1
+            )
+        """))
+        conn.execute(text("""
+            DELETE FROM cart_items
+            WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id)
+        """))
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {CART_UNIQUE_INDEX} ON cart_items (user_id, product_id)"
+        ))
+
+
+async def cart_summary(db: AsyncSession, user_id: int) -> dict:
+    """Cart lines joined with product data, plus totals, in one query"""
+    line_total = Product.price * CartItem.quantity
+    rows = (await db.execute(
+        select(
+            CartItem.id,
+            CartItem.product_id,
+            CartItem.quantity,
+            CartItem.created_at,
+            Product.name,
+            Product.price,
+            Product.image_url,
+            Product.stock_quantity,
+            line_total.label("line_total"),
+            func.sum(line_total).over().label("total"),
+            func.sum(CartItem.quantity).over().label("total_quantity"),
+            func.count().over().label("item_count"),
+        )
+        .join(Product, Product.id == CartItem.product_id)
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.created_at, CartItem.id)
+    )).all()
+
+    if not rows:
+        return {"items": [], "total": 0, "item_count": 0, "total_quantity": 0}
+    return {
+        "items": [
+            {
+                "id": row.id,
+                "product_id": row.product_id,
+                "quantity": row.quantity,
+                "created_at": row.created_at,
+                "name": row.name,
+                "price": row.price,
+                "image_url": row.image_url,
+                "stock_quantity": row.stock_quantity,
+                "line_total": row.line_total,
+            }
+            for row in rows
+        ],
+        "total": rows[0].total,
+        "item_count": rows[0].item_count,
+        "total_quantity": rows[0].total_quantity,
+    }
+
+
+def merge_quantities(items: Iterable) -> Dict[int, int]:
+    """Collapse {product_id, quantity} items into product_id -> total quantity"""
+    quantities: Dict[int, int] = {}
+    for item in items:
+        if item.quantity < 1:
+            raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+async def cart_stock(db: AsyncSession, user_id: int, product_ids: Iterable[int]) -> dict:
+    """
+    product_id -> row(in_cart, available) for active products, where available
+    is stock minus other shoppers' live reservations
+    """
+    reserved = live_reservations(exclude_user_id=user_id)
+    rows = (await db.execute(
+        select(
+            Product.id,
+            func.coalesce(CartItem.quantity, 0).label("in_cart"),
+            (func.coalesce(Product.stock_quantity, 0) - func.coalesce(reserved.c.reserved, 0)).label("available"),
+        )
+        .outerjoin(CartItem, and_(CartItem.product_id == Product.id, CartItem.user_id == user_id))
+        .outerjoin(reserved, reserved.c.product_id == Product.id)
+        .where(Product.id.in_(list(product_ids)), Product.is_active.is_(True))
+    )).all()
+    return {row.id: row for row in rows}
+
+
+async def validate_stock(db: AsyncSession, user_id: int, quantities: Dict[int, int], replace: bool = False):
+    """
+    Check products exist and have stock available for what is already in the
+    cart plus quantities (or for exactly quantities with replace=True)
+    """
+    found = await cart_stock(db, user_id, quantities)
+    missing = sorted(set(quantities) - set(found))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Product not found: {missing}")
+    short = sorted(
+        product_id for product_id, quantity in quantities.items()
+        if (0 if replace else found[product_id].in_cart) + quantity > found[product_id].available
+    )
+    if short:
+        raise HTTPException(status_code=400, detail=f"Insufficient stock for products: {short}")
+
+
+async def upsert_cart_items(db: AsyncSession, user_id: int, quantities: Dict[int, int], keep_larger: bool = False):
+    """
+    Add quantities to the user's cart (or with keep_larger=True raise each line
+    to at least its quantity) and refresh its reservations; caller commits
+    """
+    stmt = dialect_insert(db)(CartItem).values([
+        {"user_id": user_id, "product_id": product_id, "quantity": quantity}
+        for product_id, quantity in quantities.items()
+    ])
+    if keep_larger:
+        merged = case(
+            (stmt.excluded.quantity > CartItem.quantity, stmt.excluded.quantity), else_=CartItem.quantity,
+        )
+    else:
+        merged = CartItem.quantity + stmt.excluded.quantity
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CartItem.user_id, CartItem.product_id],
+        set_={"quantity": merged},
+    )
+    await db.execute(stmt)
+    await sync_reservations(db, user_id, quantities)
@@ -0,0 +1,141 @@
+"""
+Catalog Response Cache
+
+Caches serialized JSON bodies of the public catalog read endpoints. Each entry
+is tagged with the rows it depends on ("product:<id>", "category:<id>") and
+the listings it belongs to ("products", "categories"); catalog writes
+invalidate exactly the tags they touch. The cache is per process, so other
+workers converge within CATALOG_CACHE_TTL_SECONDS.
+
+Every write also bumps the catalog version. Responses carry a content-hash
+ETag, Last-Modified (time of the latest catalog write) and Cache-Control, and
+a matching If-None-Match on a cached entry is answered with 304 without
+touching the database. Readers note the version before querying and pass it
+to put(), which skips storing the body if a write landed in between, so a
+response built from pre-write rows is never cached.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from threading import Lock
+from typing import Iterable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.serialization import dump_json, dump_orm_json
+
+# Product fields that decide whether/where a product appears in listings
+LISTING_FIELDS = {"name", "description", "price", "category_id", "is_active"}
+
+# Product fields that feed the facet counts
+FACET_FIELDS = LISTING_FIELDS | {"age_group"}
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: dict
+    tags: frozenset
+    etag: str
+
+    def to_response(self, request: Request, hit: bool = True) -> Response:
+        """Full response, or 304 Not Modified when the client already has this body"""
+        headers = {
+            **self.headers,
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={settings.CATALOG_HTTP_MAX_AGE}, must-revalidate",
+            "X-Cache": "HIT" if hit else "MISS",
+        }
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+class CatalogCache:
+    """Tag-invalidated LRU/TTL cache of serialized catalog responses"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize, ttl)
+        self._version_lock = Lock()
+        self.invalidations = 0
+        self.version = 1
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return self._entries.get(key)
+
+    def put(
+        self, key: str, content, tags: Iterable[str], version: int, headers: dict = None, schema=None,
+    ) -> CachedResponse:
+        """
+        Serialize content (ORM rows through schema, or ready models/data) and cache
+        it under key, unless the catalog changed since version was read
+        """
+        body = dump_orm_json(schema, content) if schema is not None else dump_json(content)
+        headers = {
+            **(headers or {}),
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "X-Catalog-Version": str(self.version),
+        }
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry = CachedResponse(body, headers, frozenset(tags), etag)
+        with self._version_lock:
+            if version == self.version:
+                self._entries.set(key, entry)
+        return entry
+
+    def invalidate(self, *tags: str) -> int:
+        """Record a catalog write and drop every entry carrying any of tags"""
+        doomed = frozenset(tags)
+        with self._version_lock:
+            self.version += 1
+            self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            removed = self._entries.pop_where(lambda entry: not doomed.isdisjoint(entry.tags))
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {**self._entries.stats(), "invalidations": self.invalidations, "version": self.version}
+
+
+def cache_key(endpoint: str, **params) -> str:
+    """Normalized key: endpoint plus its non-empty params in sorted order"""
+    parts = [f"{name}={value}" for name, value in sorted(params.items()) if value is not None]
+    return f"{endpoint}?{'&'.join(parts)}"
+
+
+def product_tags(product_ids: Iterable[int]) -> set:
+    return {f"product:{product_id}" for product_id in product_ids}
+
+
+def invalidate_product_change(product, changed_fields: Iterable[str] = (), old_category_id: int = None):
+    """
+    Invalidate after a product write. Changing a listing field (or creating /
+    deleting the product) can move it into or out of any listing; anything
+    else only touches entries that already contain it.
+    """
+    changed_fields = set(changed_fields)
+    tags = {f"product:{product.id}"}
+    if FACET_FIELDS.intersection(changed_fields):
+        tags.add("facets")
+    if LISTING_FIELDS.intersection(changed_fields):
+        tags.add("products")
+        tags.add(f"category:{product.category_id}")
+        if old_category_id is not None:
+            tags.add(f"category:{old_category_id}")
+    catalog_cache.invalidate(*tags)
+
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS)
@@ -0,0 +1,180 @@
+"""
+Stateless Guest Carts
+
+Anonymous shoppers keep their cart in a signed token instead of database
+rows, so browsing never writes. The token is "<issued_at>.<pid>-<qty>_..."
+followed by an HMAC-SHA256 signature keyed from SECRET_KEY; it is capped at
+GUEST_CART_MAX_ITEMS lines and GUEST_CART_MAX_QUANTITY per line. Pricing and
+stock (net of live reservations) for a guest cart come from one batched
+product read, and the cart is only written to cart_items when the shopper
+logs in or checks out. Merging raises each cart line to the guest quantity
+rather than adding to it, so replaying a token (login, then merge, then
+checkout) never counts it twice; each of those responses also hands back an
+empty token for the client to store.
+"""
+import base64
+import hashlib
+import hmac
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.product import Product
+from app.services.cart import cart_stock, upsert_cart_items
+from app.services.reservations import live_reservations
+
+GUEST_CART_HEADER = "X-Guest-Cart"
+
+# Longest token a full cart can produce; anything longer is rejected unread
+MAX_TOKEN_LENGTH = 64 + 24 * settings.GUEST_CART_MAX_ITEMS
+
+_signing_key = hmac.new(settings.SECRET_KEY.encode(), b"guest-cart", hashlib.sha256).digest()
+
+
+class InvalidGuestCart(Exception):
+    """Guest cart token is malformed, tampered with, expired or over the size cap"""
+
+
+def _sign(body: str) -> str:
+    digest = hmac.new(_signing_key, body.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def check_guest_cart(quantities: Dict[int, int]):
+    """Enforce the size caps on a guest cart"""
+    if len(quantities) > settings.GUEST_CART_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400, detail=f"Guest carts hold at most {settings.GUEST_CART_MAX_ITEMS} products",
+        )
+    if any(quantity > settings.GUEST_CART_MAX_QUANTITY for quantity in quantities.values()):
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.GUEST_CART_MAX_QUANTITY} of one product per guest cart",
+        )
+
+
+def encode_guest_cart(quantities: Dict[int, int]) -> str:
+    check_guest_cart(quantities)
+    lines = "_".join(f"{product_id}-{quantity}" for product_id, quantity in sorted(quantities.items()))
+    body = f"{int(time.time())}.{lines}"
+    return f"{body}.{_sign(body)}"
+
+
+def decode_guest_cart(token: str) -> Dict[int, int]:
+    """Verify a guest cart token and return product_id -> quantity"""
+    if len(token) > MAX_TOKEN_LENGTH:
+        raise InvalidGuestCart()
+    body, _, signature = token.rpartition(".")
+    if not body or not hmac.compare_digest(signature, _sign(body)):
+        raise InvalidGuestCart()
+
+    issued_at, _, lines = body.partition(".")
+    try:
+        if time.time() - int(issued_at) > settings.GUEST_CART_TTL_DAYS * 86400:
+            raise InvalidGuestCart()
+        quantities = {}
+        for line in filter(None, lines.split("_")):
+            product_id, quantity = line.split("-")
+            quantities[int(product_id)] = int(quantity)
+    except ValueError:
+        raise InvalidGuestCart()
+    if len(quantities) > settings.GUEST_CART_MAX_ITEMS:
+        raise InvalidGuestCart()
+    return quantities
+
+
+def clear_guest_cart(response: Response, token: Optional[str]):
+    """After merging token, send an empty guest cart back for the client to store"""
+    if token:
+        response.headers[GUEST_CART_HEADER] = encode_guest_cart({})
+
+
+def read_guest_cart(token: Optional[str]) -> Dict[int, int]:
+    """Decode the guest cart header for a request; a missing token is an empty cart"""
+    if not token:
+        return {}
+    try:
+        return decode_guest_cart(token)
+    except InvalidGuestCart:
+        raise HTTPException(status_code=400, detail="Invalid or expired guest cart")
+
+
+async def guest_cart_summary(db: AsyncSession, quantities: Dict[int, int], strict: bool = False) -> dict:
+    """
+    Price a guest cart with a single product read. Unavailable products are
+    dropped, or with strict=True rejected along with quantities over stock.
+    """
+    products = {}
+    if quantities:
+        reserved = live_reservations()
+        rows = (await db.execute(
+            select(
+                Product.id, Product.name, Product.price, Product.image_url, Product.stock_quantity,
+                (func.coalesce(Product.stock_quantity, 0) - func.coalesce(reserved.c.reserved, 0)).label("available"),
+            )
+            .outerjoin(reserved, reserved.c.product_id == Product.id)
+            .where(Product.id.in_(quantities), Product.is_active.is_(True))
+        )).all()
+        products = {row.id: row for row in rows}
+
+    if strict:
+        missing = sorted(set(quantities) - set(products))
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Product not found: {missing}")
+        short = sorted(
+            product_id for product_id, quantity in quantities.items()
+            if quantity > products[product_id].available
+        )
+        if short:
+            raise HTTPException(status_code=400, detail=f"Insufficient stock for products: {short}")
+
+    items = []
+    for product_id, quantity in sorted(quantities.items()):
+        product = products.get(product_id)
+        if product is None:
+            continue
+        items.append({
+            "product_id": product_id,
+            "quantity": quantity,
+            "name": product.name,
+            "price": product.price,
+            "image_url": product.image_url,
+            "stock_quantity": product.stock_quantity,
+            "line_total": product.price * quantity,
+        })
+    kept = {item["product_id"]: item["quantity"] for item in items}
+    return {
+        "items": items,
+        "total": sum(item["line_total"] for item in items),
+        "item_count": len(items),
+        "total_quantity": sum(kept.values()),
+        "token": encode_guest_cart(kept),
+    }
+
+
+async def materialize_guest_cart(db: AsyncSession, user_id: int, token: Optional[str]) -> int:
+    """
+    Move a guest cart into the user's cart_items: each line becomes the larger
+    of what is in the cart and the guest quantity, clamped to available stock,
+    so merging the same token again changes nothing. Invalid tokens are
+    ignored; returns the number of lines raised. Caller commits.
+    """
+    try:
+        quantities = decode_guest_cart(token) if token else {}
+    except InvalidGuestCart:
+        return 0
+    if not quantities:
+        return 0
+
+    stock = await cart_stock(db, user_id, quantities)
+    clamped = {
+        product_id: min(quantities[product_id], row.available)
+        for product_id, row in stock.items()
+    }
+    raised = {product_id: quantity for product_id, quantity in clamped.items() if quantity > stock[product_id].in_cart}
+    if raised:
+        await upsert_cart_items(db, user_id, raised, keep_larger=True)
+    return len(raised)
@@ -0,0 +1,137 @@
+"""
+Idempotency keys for safely retried order creation
+"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import select, update, delete, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.utils.db import dialect_insert, purge_in_batches
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(*parts: Optional[str]) -> str:
+    """Hash of the request body (and relevant headers) a key was first used with"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def claim_idempotency_key(
+    db: AsyncSession, user_id: int, key: str, request_hash: str
+) -> Optional[Response]:
+    """
+    Claim key for this request, committing the claim. Returns None when the
+    caller should do the work, or the stored response to replay. Raises 409
+    while another request holds the key, 422 if it was used for a different request.
+
+    The claim is committed straight away so concurrent duplicates see it; the
+    response is stored in the caller's transaction. An expired row, or a claim
+    left unfinished for IDEMPOTENCY_LOCK_SECONDS (a crashed worker), is taken over.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+    now = datetime.utcnow()
+    fresh_claim = {
+        "request_hash": request_hash,
+        "status_code": None,
+        "response_body": None,
+        "response_headers": None,
+        "locked_at": now,
+        "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    }
+    result = await db.execute(
+        dialect_insert(db)(IdempotencyKey)
+        .values(user_id=user_id, key=key, **fresh_claim)
+        .on_conflict_do_nothing(index_elements=[IdempotencyKey.user_id, IdempotencyKey.key])
+    )
+    await db.commit()
+    if result.rowcount == 1:
+        return None
+
+    # Take over an expired row, or an unfinished claim whose worker went away
+    result = await db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            or_(
+                IdempotencyKey.expires_at <= now,
+                and_(
+                    IdempotencyKey.status_code.is_(None),
+                    IdempotencyKey.request_hash == request_hash,
+                    IdempotencyKey.locked_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                ),
+            ),
+        )
+        .values(**fresh_claim)
+    )
+    await db.commit()
+    if result.rowcount == 1:
+        return None
+
+    row = await db.scalar(
+        select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    )
+    if row is None:
+        # Swept between our statements; the client can simply retry
+        raise HTTPException(status_code=409, detail="Request in progress, please retry", headers={"Retry-After": "1"})
+    if row.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{IDEMPOTENCY_HEADER} was already used for a different request",
+        )
+    if row.status_code is None:
+        raise HTTPException(
+            status_code=409, detail="A request with this key is still in progress", headers={"Retry-After": "1"},
+        )
+    return Response(
+        content=row.response_body,
+        status_code=row.status_code,
+        media_type="application/json",
+        headers={**json.loads(row.response_headers or "{}"), REPLAYED_HEADER: "true"},
+    )
+
+
+async def complete_idempotency_key(
+    db: AsyncSession, user_id: int, key: str, status_code: int, body: str, headers: Optional[Dict[str, str]] = None,
+):
+    """Store the response (and headers to replay) for key; call inside the transaction doing the work, caller commits"""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body, response_headers=json.dumps(headers or {}))
+    )
+
+
+async def release_idempotency_key(db: AsyncSession, user_id: int, key: str):
+    """Drop an unfinished claim after the work failed, so a retry runs it again"""
+    await db.rollback()
+    await db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+        )
+    )
+    await db.commit()
+
+
+async def purge_expired_idempotency_keys(
+    db: AsyncSession, batch_size: int, stop: Optional[asyncio.Event] = None
+) -> int:
+    """Delete expired keys in batches; see purge_in_batches"""
+    return await purge_in_batches(db, IdempotencyKey, IdempotencyKey.expires_at <= datetime.utcnow(), batch_size, stop)
@@ -0,0 +1,91 @@
+"""
+Streaming Order Export
+
+Orders are read joined to their items, in (created_at, id) order, through a
+server-side cursor (AsyncSession.stream with yield_per) and written out one
+batch at a time, so memory stays flat however many orders match. CSV has one
+row per order item with the order columns repeated; NDJSON has one line per
+order with its items nested. The generators open their own session because
+the response body is produced after the endpoint has returned.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.cart import Order, OrderItem
+from app.models.user import User
+from app.services.order_filters import filter_orders
+
+# Rows fetched from the cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+ORDER_COLUMNS = [
+    "order_id", "order_number", "user_id", "user_email", "status", "payment_status",
+    "payment_method", "total_amount", "shipping_address_id", "created_at",
+]
+ITEM_COLUMNS = ["item_id", "product_id", "quantity", "price_at_purchase"]
+
+
+def export_query(**filters):
+    """Orders outer-joined to their items, filtered (see filter_orders), in export order"""
+    query = (
+        select(
+            Order.id.label("order_id"), Order.order_number, Order.user_id, User.email.label("user_email"),
+            Order.status, Order.payment_status, Order.payment_method, Order.total_amount,
+            Order.shipping_address_id, Order.created_at,
+            OrderItem.id.label("item_id"), OrderItem.product_id, OrderItem.quantity, OrderItem.price_at_purchase,
+        )
+        .join(User, User.id == Order.user_id)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .order_by(Order.created_at, Order.id, OrderItem.id)
+    )
+    return filter_orders(query, **filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+async def _stream_rows(query) -> AsyncIterator[list]:
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def export_csv(query) -> AsyncIterator[str]:
+    """One CSV row per order item (orders without items get one row with empty item columns)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ORDER_COLUMNS + ITEM_COLUMNS)
+    yield buffer.getvalue()
+
+    async for rows in _stream_rows(query):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_value(getattr(row, column)) for column in ORDER_COLUMNS + ITEM_COLUMNS] for row in rows)
+        yield buffer.getvalue()
+
+
+async def export_ndjson(query) -> AsyncIterator[str]:
+    """One JSON object per order with its items nested"""
+    order = None
+    async for rows in _stream_rows(query):
+        lines = []
+        for row in rows:
+            if order is None or order["order_id"] != row.order_id:
+                if order is not None:
+                    lines.append(json.dumps(order))
+                order = {column: _value(getattr(row, column)) for column in ORDER_COLUMNS}
+                order["items"] = []
+            if row.item_id is not None:
+                order["items"].append({column: getattr(row, column) for column in ITEM_COLUMNS})
+        if lines:
+            yield "\n".join(lines) + "\n"
+    if order is not None:
+        yield json.dumps(order) + "\n"
@@ -0,0 +1,41 @@
+"""
+Admin Order Filters
+
+Shared by the admin order grid and the order export. Each equality filter
+lines up with a composite (column, created_at, id) index on orders, so a
+filtered page is an index range scan in the grid's (created_at, id) order
+rather than a full scan. Email is resolved through the unique users.email
+index and then uses (user_id, created_at, id).
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.models.cart import Order
+from app.models.user import User
+
+
+def filter_orders(
+    query,
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    email: Optional[str] = None,
+    order_number: Optional[str] = None,
+):
+    """Apply the admin filters to a query over Order"""
+    if order_number:
+        query = query.where(Order.order_number == order_number)
+    if email:
+        query = query.where(Order.user_id.in_(select(User.id).where(User.email == email)))
+    if status:
+        query = query.where(Order.status == status)
+    if payment_status:
+        query = query.where(Order.payment_status == payment_status)
+    if date_from:
+        query = query.where(Order.created_at >= date_from)
+    if date_to:
+        query = query.where(Order.created_at < date_to)
+    return query
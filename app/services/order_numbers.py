@@ -0,0 +1,111 @@
+"""
+Order Number Generation
+
+Order numbers must be unique across every worker process and host without a
+database round trip. The default "random" generator draws 100 random bits
+per number and needs no configuration. The "snowflake" generator packs a
+millisecond timestamp, ORDER_NUMBER_HOST_ID (0-1023), the process id and a
+per-millisecond counter into one integer, rendered as fixed-width base 36
+after the ORD prefix (e.g. ORD070HJUO7UTIGNEPKW), so numbers sort by
+creation time. Containers usually all run as pid 1, so the host id is the
+only thing telling replicas apart: choosing snowflake without an explicit
+ORDER_NUMBER_HOST_ID fails at startup.
+"""
+import os
+import secrets
+import threading
+import time
+
+from app.config import settings
+
+PREFIX = "ORD"
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+TIMESTAMP_BITS = 42  # ~139 years of milliseconds
+HOST_BITS = 10
+PID_BITS = 22  # Linux pid_max is at most 2**22
+SEQUENCE_BITS = 12
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def _base36(number: int, width: int) -> str:
+    digits = []
+    while number:
+        number, digit = divmod(number, 36)
+        digits.append(ALPHABET[digit])
+    return "".join(reversed(digits)).rjust(width, "0")
+
+
+def _width(bits: int) -> int:
+    return len(_base36((1 << bits) - 1, 0))
+
+
+class SnowflakeOrderNumbers:
+    """Time + host + pid + counter ids; thread-safe, never repeats within a process"""
+
+    width = _width(TIMESTAMP_BITS + HOST_BITS + PID_BITS + SEQUENCE_BITS)
+
+    def __init__(self, host_id: int):
+        if not 0 <= host_id < (1 << HOST_BITS):
+            raise ValueError(f"ORDER_NUMBER_HOST_ID must be between 0 and {(1 << HOST_BITS) - 1}")
+        self.host_id = host_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+            # If the clock steps back, keep counting on the last millisecond used
+            if now_ms <= self._last_ms:
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # Counter exhausted: borrow the next millisecond
+                    self._last_ms += 1
+                    self._sequence = 0
+            else:
+                self._last_ms = now_ms
+                self._sequence = 0
+            timestamp, sequence = self._last_ms, self._sequence
+
+        node = (self.host_id << PID_BITS) | (os.getpid() & ((1 << PID_BITS) - 1))
+        return (((timestamp << (HOST_BITS + PID_BITS)) | node) << SEQUENCE_BITS) | sequence
+
+    def __call__(self) -> str:
+        return PREFIX + _base36(self.next_id(), self.width)
+
+
+class RandomOrderNumbers:
+    """100 random bits per number; unique with overwhelming probability, no configuration"""
+
+    bits = 100
+    width = _width(bits)
+
+    def __call__(self) -> str:
+        return PREFIX + _base36(secrets.randbits(self.bits), self.width)
+
+
+def _configured_snowflake() -> SnowflakeOrderNumbers:
+    if settings.ORDER_NUMBER_HOST_ID is None:
+        raise ValueError(
+            "ORDER_NUMBER_GENERATOR=snowflake needs ORDER_NUMBER_HOST_ID set, distinct on every host "
+            "or replica (otherwise use ORDER_NUMBER_GENERATOR=random)"
+        )
+    return SnowflakeOrderNumbers(settings.ORDER_NUMBER_HOST_ID)
+
+
+GENERATORS = {
+    "snowflake": _configured_snowflake,
+    "random": RandomOrderNumbers,
+}
+
+
+def build_generator(name: str):
+    try:
+        return GENERATORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown ORDER_NUMBER_GENERATOR {name!r}; choose from {sorted(GENERATORS)}")
+
+
+order_number_generator = build_generator(settings.ORDER_NUMBER_GENERATOR)
@@ -0,0 +1,91 @@
+"""
+Order Status State Machine
+
+Orders move pending -> paid -> shipped -> delivered; pending and paid
+orders may be cancelled, shipped and delivered ones may not. A transition
+for any number of orders is one UPDATE ... WHERE id IN (...) AND status IN
+(statuses allowed to reach the target) RETURNING id, so concurrent requests
+can never apply the same transition twice. Cancelling restocks every
+product of the cancelled orders in one more UPDATE.
+"""
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cart import Order, OrderItem
+from app.models.product import Product
+from app.services.outbox import enqueue
+
+TRANSITIONS: Dict[str, set] = {
+    "pending": {"paid", "cancelled"},
+    "paid": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+ORDER_STATUSES = list(TRANSITIONS)
+
+
+def sources_for(target: str) -> List[str]:
+    """Statuses an order may move to target from"""
+    if target not in TRANSITIONS:
+        raise HTTPException(status_code=400, detail=f"status must be one of {ORDER_STATUSES}")
+    return [source for source, targets in TRANSITIONS.items() if target in targets]
+
+
+async def restock_orders(db: AsyncSession, order_ids: List[int]) -> List[int]:
+    """Return the items of order_ids to stock in one UPDATE; returns the product ids touched"""
+    returned = (
+        select(func.sum(OrderItem.quantity))
+        .where(OrderItem.product_id == Product.id, OrderItem.order_id.in_(order_ids))
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Product)
+        .where(Product.id.in_(select(OrderItem.product_id).where(OrderItem.order_id.in_(order_ids))))
+        .values(stock_quantity=Product.stock_quantity + returned)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars())
+
+
+async def transition_orders(db: AsyncSession, order_ids: List[int], target: str) -> dict:
+    """
+    Move order_ids to target where the state machine allows it.
+    Returns {"applied": [...], "rejected": [{"id", "reason"}], "restocked_products": [...]}; caller commits.
+    """
+    sources = sources_for(target)
+    order_ids = list(dict.fromkeys(order_ids))
+    applied = []
+    if sources and order_ids:
+        result = await db.execute(
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status.in_(sources))
+            .values(status=target)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        applied = sorted(result.scalars())
+
+    applied_set = set(applied)
+    remaining = [order_id for order_id in order_ids if order_id not in applied_set]
+    current = {}
+    if remaining:
+        current = dict((await db.execute(select(Order.id, Order.status).where(Order.id.in_(remaining)))).all())
+    rejected = [
+        {
+            "id": order_id,
+            "reason": f"cannot move from {current[order_id]} to {target}" if order_id in current else "not found",
+        }
+        for order_id in remaining
+    ]
+
+    restocked = []
+    if applied:
+        if target == "cancelled":
+            restocked = await restock_orders(db, applied)
+        enqueue(db, "order.status_changed", {"order_ids": applied, "status": target})
+    return {"status": target, "applied": applied, "rejected": rejected, "restocked_products": restocked}
@@ -0,0 +1,173 @@
+"""
+Transactional outbox for post-commit side effects
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.outbox import OutboxEvent
+from app.utils.background import BackgroundLoop
+from app.utils.db import purge_in_batches
+
+Handler = Callable[[int, dict], Awaitable[None]]
+
+# event_type -> {handler name -> handler(event_id, payload)}
+HANDLERS: Dict[str, Dict[str, Handler]] = {}
+
+
+def outbox_handler(event_type: str, name: str = None):
+    """Register an async handler(event_id, payload) for event_type"""
+    def register(func: Handler) -> Handler:
+        HANDLERS.setdefault(event_type, {})[name or func.__name__] = func
+        return func
+    return register
+
+
+def enqueue(db: AsyncSession, event_type: str, payload: dict) -> OutboxEvent:
+    """
+    Record an event in the caller's transaction, so it is emitted exactly when
+    the write commits; caller commits, then calls outbox_worker.notify()
+    """
+    event = OutboxEvent(event_type=event_type, payload=json.dumps(payload, default=str))
+    db.add(event)
+    return event
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(settings.OUTBOX_MAX_BACKOFF_SECONDS, settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1))
+
+
+async def claim_events(db: AsyncSession, batch_size: int, lease_seconds: float):
+    """Lease up to batch_size due pending events to this worker, oldest first"""
+    now = datetime.utcnow()
+    due = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+    )
+    events = (await db.scalars(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(due.scalar_subquery()), OutboxEvent.available_at <= now)
+        .values(available_at=now + timedelta(seconds=lease_seconds), attempts=OutboxEvent.attempts + 1)
+        .returning(OutboxEvent)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    return sorted(events, key=lambda event: event.id)
+
+
+class OutboxWorker(BackgroundLoop):
+    """
+    Drains outbox_events in the background of each app process. Handlers run
+    at least once and each event records which completed, so a retry only
+    re-runs the failed ones; failures back off exponentially and the event
+    is marked failed after max_attempts.
+    """
+
+    def __init__(
+        self, batch_size: int, poll_seconds: float, lease_seconds: float, max_attempts: int, stop_timeout: float,
+    ):
+        super().__init__(poll_seconds, stop_timeout)
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.counters = Counter()
+        self.handler_seconds = Counter()
+        self.last_batch_at = None
+
+    async def _handle(self, event: OutboxEvent):
+        """Run the handlers this event has not completed yet; returns (completed, error)"""
+        handlers = HANDLERS.get(event.event_type, {})
+        completed = [name for name in event.completed_handlers.split(",") if name]
+        payload = json.loads(event.payload)
+        for name, handler in handlers.items():
+            if name in completed:
+                continue
+            start = time.perf_counter()
+            try:
+                await handler(event.id, payload)
+            except Exception as exc:
+                self.counters[f"handler_errors:{name}"] += 1
+                return completed, f"{name}: {exc!r}"
+            finally:
+                self.handler_seconds[name] += time.perf_counter() - start
+            completed.append(name)
+        return completed, None
+
+    async def process_batch(self) -> int:
+        """Claim and handle one batch; returns the number of events claimed"""
+        async with AsyncSessionLocal() as db:
+            events = await claim_events(db, self.batch_size, self.lease_seconds)
+            for event in events:
+                completed, error = await self._handle(event)
+                values = {"completed_handlers": ",".join(completed)}
+                if error is None:
+                    values.update(status="done", processed_at=datetime.utcnow(), last_error=None)
+                    self.counters["processed"] += 1
+                elif event.attempts >= self.max_attempts:
+                    values.update(status="failed", last_error=error)
+                    self.counters["failed"] += 1
+                else:
+                    values.update(
+                        available_at=datetime.utcnow() + timedelta(seconds=backoff_seconds(event.attempts)),
+                        last_error=error,
+                    )
+                    self.counters["retried"] += 1
+                await db.execute(update(OutboxEvent).where(OutboxEvent.id == event.id).values(**values))
+                await db.commit()
+        self.last_batch_at = datetime.utcnow()
+        return len(events)
+
+    async def run_once(self) -> bool:
+        # A full batch means more may be due; otherwise sleep until the next poll or notify()
+        return await self.process_batch() == self.batch_size
+
+    def on_error(self, exc: Exception):
+        self.counters["batch_errors"] += 1
+
+    async def metrics(self, db: AsyncSession) -> dict:
+        """Queue depth from the table plus this worker's counters"""
+        now = datetime.utcnow()
+        rows = (await db.execute(
+            select(OutboxEvent.status, func.count(), func.min(OutboxEvent.created_at))
+            .where(OutboxEvent.status.in_(["pending", "failed"]))
+            .group_by(OutboxEvent.status)
+        )).all()
+        depth = {row[0]: row[1] for row in rows}
+        oldest_pending = next((row[2] for row in rows if row[0] == "pending"), None)
+        return {
+            "pending": depth.get("pending", 0),
+            "failed": depth.get("failed", 0),
+            "oldest_pending_seconds": (now - oldest_pending).total_seconds() if oldest_pending else 0,
+            "worker": {
+                **self.counters,
+                "handler_seconds": {name: round(seconds, 3) for name, seconds in self.handler_seconds.items()},
+                "last_batch_at": self.last_batch_at,
+            },
+        }
+
+
+async def purge_processed_events(db: AsyncSession, batch_size: int, stop: Optional[asyncio.Event] = None) -> int:
+    """Delete done events older than OUTBOX_RETENTION_DAYS in batches; see purge_in_batches"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    return await purge_in_batches(
+        db, OutboxEvent, (OutboxEvent.status == "done") & (OutboxEvent.processed_at <= cutoff), batch_size, stop
+    )
+
+
+outbox_worker = OutboxWorker(
+    settings.OUTBOX_BATCH_SIZE,
+    settings.OUTBOX_POLL_SECONDS,
+    settings.OUTBOX_LEASE_SECONDS,
+    settings.OUTBOX_MAX_ATTEMPTS,
+    settings.BACKGROUND_STOP_TIMEOUT_SECONDS,
+)
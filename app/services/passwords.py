@@ -0,0 +1,59 @@
+"""
+Password Hashing Off the Event Loop
+
+bcrypt is deliberately slow (~100-250 ms of CPU per call). Hashing and
+verification run in a dedicated, size-limited thread pool (bcrypt releases
+the GIL while it works) so the event loop keeps serving other requests.
+Once PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT calls are in flight,
+further calls are refused with 503 instead of piling up.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import settings
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class PasswordHasher:
+    """Runs pwd_context calls on a bounded worker pool"""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.capacity = workers + queue_limit
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    async def _run(self, func, *args):
+        # Only touched from the event loop thread, so no lock is needed
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "capacity": self.capacity, "rejected": self.rejected}
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT)
@@ -0,0 +1,70 @@
+"""
+Authenticated Principal Cache
+
+Resolving a bearer token to its user costs a users-table lookup on every
+authenticated request. Resolved principals are kept in a bounded TTL cache
+keyed by the SHA-256 of the token, so repeat requests skip the database.
+Entries never outlive their token, and are dropped when the user is updated
+or deactivated (per process; other workers converge within the TTL).
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of the authenticated user"""
+    id: int
+    email: str
+    role: str
+    is_active: bool
+    full_name: Optional[str]
+    phone: Optional[str]
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            full_name=user.full_name,
+            phone=user.phone,
+            created_at=user.created_at,
+        )
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """Token-hash -> Principal cache with per-user invalidation"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize, ttl)
+
+    def get(self, token: str) -> Optional[Principal]:
+        return self._entries.get(_token_key(token))
+
+    def put(self, token: str, principal: Principal, expires_in: float = None):
+        """Cache principal for token, for at most expires_in seconds"""
+        ttl = self._entries.ttl if expires_in is None else min(self._entries.ttl, expires_in)
+        if ttl > 0:
+            self._entries.set(_token_key(token), principal, ttl=ttl)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Forget every cached token of user_id"""
+        return self._entries.pop_where(lambda principal: principal.id == user_id)
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS)
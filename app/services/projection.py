@@ -0,0 +1,70 @@
+"""
+Sparse Fieldsets for Product Listings
+
+`?fields=id,name,price` limits both the SELECT (via load_only, skipping the
+category load unless asked for) and the serialized response (via a slim
+schema built from ProductResponse and cached per field set).
+"""
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+from pydantic import ConfigDict, create_model
+from sqlalchemy.orm import load_only, selectinload
+
+from app.models.product import Product
+from app.schemas.product import ProductResponse, ProductFieldsResponse
+
+PRODUCT_FIELDS = tuple(ProductResponse.model_fields)
+
+# response_model for listings taking ?fields=: full products, or products trimmed to the fields
+SPARSE_PRODUCT_LIST = Union[List[ProductResponse], List[ProductFieldsResponse]]
+FIELDS_DESCRIPTION = (
+    "Comma-separated subset of response fields; the response then holds only those "
+    f"keys (ProductFieldsResponse). Choose from: {', '.join(PRODUCT_FIELDS)}"
+)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Validate a comma-separated field list; None means the full response"""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(PRODUCT_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; choose from {', '.join(PRODUCT_FIELDS)}",
+        )
+    # Normalized to schema order so equivalent requests share a cache key
+    return tuple(name for name in PRODUCT_FIELDS if name in requested)
+
+
+def product_load_options(fields: Optional[Tuple[str, ...]], *always):
+    """Loader options for the requested fields; always lists extra columns needed server-side"""
+    if fields is None:
+        return [selectinload(Product.category)]
+
+    columns = {Product.id, *always}
+    columns.update(getattr(Product, name) for name in fields if name != "category")
+    options = []
+    if "category" in fields:
+        columns.add(Product.category_id)
+        options.append(selectinload(Product.category))
+    return [load_only(*columns), *options]
+
+
+@lru_cache(maxsize=256)
+def product_schema(fields: Optional[Tuple[str, ...]]):
+    """ProductResponse, or a slim model holding only fields"""
+    if fields is None:
+        return ProductResponse
+    definitions = {
+        name: (ProductResponse.model_fields[name].annotation, ProductResponse.model_fields[name])
+        for name in fields
+    }
+    return create_model(
+        f"ProductFields_{'_'.join(fields)}",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
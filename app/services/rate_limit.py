@@ -0,0 +1,77 @@
+"""
+Token-Bucket Rate Limiting for Auth Endpoints
+
+Each key (client IP or account) owns a bucket of `burst` tokens refilled at
+`per_minute` tokens a minute; a request spends one token or is rejected with
+429 before any password hashing or database work happens. Buckets live in a
+bounded LRU table whose entries expire once they would have refilled, so a
+flood of distinct keys costs at most RATE_LIMIT_MAX_KEYS small entries.
+A rate of 0 disables that limiter.
+"""
+import math
+import time
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets in an LRU-evicted table"""
+
+    def __init__(self, per_minute: int, burst: int, max_keys: int):
+        if per_minute < 0:
+            raise ValueError(f"rate limit must be >= 0 per minute (0 disables it), got {per_minute}")
+        self.enabled = per_minute > 0
+        if self.enabled and burst < 1:
+            raise ValueError(f"rate limit burst must be >= 1, got {burst}")
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        # An untouched bucket is full again after this long, so it can be forgotten
+        self.refill_seconds = burst / self.rate if self.enabled else 0
+        self._buckets = TTLCache(max_keys, self.refill_seconds)
+
+    def acquire(self, key: str) -> float:
+        """Spend a token for key; returns 0 if allowed, else seconds until one is available"""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            self._buckets.set(key, (tokens, now))
+            return (1 - tokens) / self.rate
+        self._buckets.set(key, (tokens - 1, now))
+        return 0.0
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "keys": len(self._buckets), "max_keys": self._buckets.maxsize}
+
+
+login_ip_limiter = TokenBucketLimiter(
+    settings.LOGIN_RATE_PER_IP_PER_MINUTE, settings.LOGIN_BURST_PER_IP, settings.RATE_LIMIT_MAX_KEYS,
+)
+# Shared by login and register, keyed by the lower-cased email
+account_limiter = TokenBucketLimiter(
+    settings.LOGIN_RATE_PER_ACCOUNT_PER_MINUTE, settings.LOGIN_BURST_PER_ACCOUNT, settings.RATE_LIMIT_MAX_KEYS,
+)
+register_ip_limiter = TokenBucketLimiter(
+    settings.REGISTER_RATE_PER_IP_PER_MINUTE, settings.REGISTER_BURST_PER_IP, settings.RATE_LIMIT_MAX_KEYS,
+)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def enforce(*checks):
+    """Raise 429 unless every (limiter, key) pair has a token to spend"""
+    for limiter, key in checks:
+        retry_after = limiter.acquire(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
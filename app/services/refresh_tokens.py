@@ -0,0 +1,141 @@
+"""
+Rotating Refresh Tokens
+
+Refresh tokens are JWTs carrying a token id (jti) and a session family id.
+Renewing a session validates the jti against the refresh_tokens table with a
+single conditional UPDATE that also marks it rotated, so it never touches
+bcrypt. The same UPDATE requires the user to be active, so a deactivated
+account cannot rotate and loses the family. Each rotation extends the
+session by REFRESH_TOKEN_EXPIRE_DAYS, but never past
+REFRESH_TOKEN_MAX_LIFETIME_DAYS after the login that started the family (its
+start time travels in the signed "fst" claim). Presenting an already-rotated
+token is treated as theft: the whole family is revoked. Revoked families are
+remembered in an in-memory set so replays are rejected without a database
+round trip.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from jose import JWTError, jwt
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.user import RefreshToken, User
+from app.utils.cache import TTLCache
+
+REFRESH_TOKEN_TYPE = "refresh"
+
+# Families revoked by this process, kept as long as any of their tokens could be valid
+revoked_families = TTLCache(maxsize=100000, ttl=settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
+
+class InvalidRefreshToken(Exception):
+    """Refresh token is malformed, expired, revoked or already used"""
+
+
+def refresh_expiry(family_started_at: datetime, now: datetime) -> datetime:
+    """Sliding expiry for a token issued now, capped at the family's absolute lifetime"""
+    return min(
+        now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        family_started_at + timedelta(days=settings.REFRESH_TOKEN_MAX_LIFETIME_DAYS),
+    )
+
+
+def _encode(claims: dict, jti: str, family_id: str, family_started_at: datetime, expires_at: datetime) -> str:
+    payload = {
+        **claims,
+        "jti": jti,
+        "fam": family_id,
+        "fst": int(family_started_at.replace(tzinfo=timezone.utc).timestamp()),
+        "type": REFRESH_TOKEN_TYPE,
+        "exp": expires_at,
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+async def issue_refresh_token(db: AsyncSession, claims: dict) -> str:
+    """Record the first refresh token of a new family (one per login) for claims["uid"]; caller commits"""
+    jti = uuid.uuid4().hex
+    family_id = uuid.uuid4().hex
+    now = datetime.utcnow()
+    expires_at = refresh_expiry(now, now)
+    db.add(RefreshToken(jti=jti, family_id=family_id, user_id=claims["uid"], expires_at=expires_at))
+    return _encode(claims, jti, family_id, now, expires_at)
+
+
+def decode_refresh_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise InvalidRefreshToken()
+    if payload.get("type") != REFRESH_TOKEN_TYPE or not payload.get("jti") or not payload.get("fam"):
+        raise InvalidRefreshToken()
+    return payload
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str):
+    """
+    Exchange a refresh token for a new one in the same family.
+    Returns (claims, new_refresh_token); commits either way.
+    """
+    payload = decode_refresh_token(token)
+    if revoked_families.get(payload["fam"]):
+        raise InvalidRefreshToken()
+
+    new_jti = uuid.uuid4().hex
+    now = datetime.utcnow()
+    # Tokens issued before "fst" existed start their absolute lifetime now
+    family_started_at = datetime.utcfromtimestamp(payload["fst"]) if "fst" in payload else now
+    expires_at = refresh_expiry(family_started_at, now)
+    if expires_at <= now:
+        raise InvalidRefreshToken()
+
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.jti == payload["jti"],
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+            RefreshToken.user_id.in_(select(User.id).where(User.is_active.is_(True))),
+        )
+        .values(revoked_at=now, replaced_by=new_jti)
+    )
+    if result.rowcount != 1:
+        # Reuse of a rotated token (assume it leaked) or a deactivated account:
+        # end the session everywhere
+        await revoke_family(db, payload["fam"])
+        raise InvalidRefreshToken()
+
+    claims = {key: payload[key] for key in ("sub", "uid", "role")}
+    db.add(RefreshToken(
+        jti=new_jti, family_id=payload["fam"], user_id=payload["uid"], expires_at=expires_at,
+    ))
+    await db.commit()
+    return claims, _encode(claims, new_jti, payload["fam"], family_started_at, expires_at)
+
+
+async def revoke_family(db: AsyncSession, family_id: str):
+    """Revoke every token of one login session"""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    await db.commit()
+    revoked_families.set(family_id, True)
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int):
+    """Revoke every refresh token of user_id; caller commits"""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+async def purge_expired_refresh_tokens(db: AsyncSession) -> int:
+    """Delete expired rows so the store stays compact; caller commits"""
+    result = await db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= datetime.utcnow()))
+    return result.rowcount
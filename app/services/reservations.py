@@ -0,0 +1,89 @@
+"""
+Time-boxed stock reservations for carted items
+"""
+from datetime import datetime, timedelta
+import asyncio
+from typing import Iterable, Optional
+
+from sqlalchemy import select, func, delete, literal, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.cart import CartItem, StockReservation
+from app.models.product import Product
+from app.utils.db import dialect_insert, purge_in_batches
+
+
+def reservation_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(minutes=settings.CART_RESERVATION_TTL_MINUTES)
+
+
+def live_reservations(exclude_user_id: Optional[int] = None):
+    """Subquery of product_id -> quantity held by unexpired reservations"""
+    query = (
+        select(StockReservation.product_id, func.sum(StockReservation.quantity).label("reserved"))
+        .where(StockReservation.expires_at > datetime.utcnow())
+        .group_by(StockReservation.product_id)
+    )
+    if exclude_user_id is not None:
+        query = query.where(StockReservation.user_id != exclude_user_id)
+    return query.subquery("live_reservations")
+
+
+async def sync_reservations(db: AsyncSession, user_id: int, product_ids: Iterable[int]):
+    """Hold stock for the user's current cart quantities of product_ids; caller commits"""
+    stmt = dialect_insert(db)(StockReservation).from_select(
+        ["user_id", "product_id", "quantity", "expires_at"],
+        select(CartItem.user_id, CartItem.product_id, CartItem.quantity, literal(reservation_expiry()))
+        .where(CartItem.user_id == user_id, CartItem.product_id.in_(list(product_ids))),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StockReservation.user_id, StockReservation.product_id],
+        set_={"quantity": stmt.excluded.quantity, "expires_at": stmt.excluded.expires_at},
+    )
+    await db.execute(stmt)
+
+
+async def checkout_lines(db: AsyncSession, user_id: int, lock: bool = False):
+    """
+    The user's cart lines with their product, the quantity the user holds
+    live ("held") and what other shoppers hold live ("reserved_by_others").
+    lock=True takes row locks on the products in id order (where supported).
+    """
+    others = live_reservations(exclude_user_id=user_id)
+    query = (
+        select(
+            CartItem,
+            Product,
+            func.coalesce(StockReservation.quantity, 0).label("held"),
+            func.coalesce(others.c.reserved, 0).label("reserved_by_others"),
+        )
+        .join(Product, Product.id == CartItem.product_id)
+        .outerjoin(StockReservation, and_(
+            StockReservation.user_id == CartItem.user_id,
+            StockReservation.product_id == CartItem.product_id,
+            StockReservation.expires_at > datetime.utcnow(),
+        ))
+        .outerjoin(others, others.c.product_id == CartItem.product_id)
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.product_id)
+    )
+    if lock:
+        # Locking in product id order means concurrent checkouts cannot deadlock
+        query = query.with_for_update(of=Product)
+    return (await db.execute(query)).all()
+
+
+async def release_reservations(db: AsyncSession, user_id: int, product_ids: Optional[Iterable[int]] = None):
+    """Drop the user's holds (on product_ids, or all of them); caller commits"""
+    stmt = delete(StockReservation).where(StockReservation.user_id == user_id)
+    if product_ids is not None:
+        stmt = stmt.where(StockReservation.product_id.in_(list(product_ids)))
+    await db.execute(stmt)
+
+
+async def purge_expired_reservations(db: AsyncSession, batch_size: int, stop: Optional[asyncio.Event] = None) -> int:
+    """Delete expired holds in batches; see purge_in_batches"""
+    return await purge_in_batches(
+        db, StockReservation, StockReservation.expires_at <= datetime.utcnow(), batch_size, stop
+    )
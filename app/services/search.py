@@ -0,0 +1,119 @@
+"""
+Product Full-Text Search
+
+PostgreSQL keeps a weighted `tsvector` column on products behind a GIN index;
+SQLite keeps an FTS5 virtual table keyed by product id. Both index the product
+name, description and category name and are re-synced by the product routes.
+"""
+import re
+
+from sqlalchemy import text, func, literal_column, table, column, or_, false
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+
+FTS_TABLE = "products_fts"
+
+# Per-column weights: name, description, category name
+SQLITE_BM25_WEIGHTS = (10.0, 2.0, 4.0)
+
+PG_VECTOR_SQL = """
+    setweight(to_tsvector('simple', coalesce(p.name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(c.name, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(p.description, '')), 'C')
+"""
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def _terms(search: str):
+    """Split user input into lowercase word tokens safe for MATCH / to_tsquery"""
+    return re.findall(r"\w+", search.lower())
+
+
+def ensure_search_index(engine):
+    """Create the search structures if missing and index any unindexed products"""
+    dialect = _dialect(engine)
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_products_search_vector "
+                "ON products USING GIN (search_vector)"
+            ))
+            conn.execute(text(f"""
+                UPDATE products AS p SET search_vector = {PG_VECTOR_SQL}
+                FROM products AS src LEFT JOIN categories AS c ON c.id = src.category_id
+                WHERE src.id = p.id AND p.search_vector IS NULL
+            """))
+        elif dialect == "sqlite":
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "name, description, category_name, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            ))
+            conn.execute(text(f"""
+                INSERT INTO {FTS_TABLE} (rowid, name, description, category_name)
+                SELECT p.id, p.name, coalesce(p.description, ''), coalesce(c.name, '')
+                FROM products AS p LEFT JOIN categories AS c ON c.id = p.category_id
+                WHERE p.id NOT IN (SELECT rowid FROM {FTS_TABLE})
+            """))
+
+
+async def index_product(db: AsyncSession, product_id: int):
+    """Re-index one product; call after flushing its changes, before commit"""
+    dialect = _dialect(db.bind)
+    if dialect == "postgresql":
+        await db.execute(text(f"""
+            UPDATE products AS p SET search_vector = {PG_VECTOR_SQL}
+            FROM products AS src LEFT JOIN categories AS c ON c.id = src.category_id
+            WHERE src.id = p.id AND p.id = :id
+        """), {"id": product_id})
+    elif dialect == "sqlite":
+        await remove_product(db, product_id)
+        await db.execute(text(f"""
+            INSERT INTO {FTS_TABLE} (rowid, name, description, category_name)
+            SELECT p.id, p.name, coalesce(p.description, ''), coalesce(c.name, '')
+            FROM products AS p LEFT JOIN categories AS c ON c.id = p.category_id
+            WHERE p.id = :id
+        """), {"id": product_id})
+
+
+async def remove_product(db: AsyncSession, product_id: int):
+    """Drop a product from the search index (the tsvector goes with the row)"""
+    if _dialect(db.bind) == "sqlite":
+        await db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": product_id})
+
+
+def search_products(db: AsyncSession, query, search: str):
+    """
+    Restrict a Product select to rows matching search (all terms, prefix match).
+
+    Returns (query, rank_order) where rank_order sorts best matches first,
+    or None when the input has no searchable terms (nothing matches then).
+    """
+    terms = _terms(search)
+    if not terms:
+        return query.where(false()), None
+
+    dialect = _dialect(db.bind)
+    if dialect == "postgresql":
+        vector = literal_column("products.search_vector")
+        ts_query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        query = query.filter(vector.op("@@")(ts_query))
+        return query, func.ts_rank(vector, ts_query).desc()
+
+    if dialect == "sqlite":
+        fts = table(FTS_TABLE, column("rowid"))
+        fts_ref = literal_column(FTS_TABLE)
+        match = " ".join(f'"{term}"*' for term in terms)
+        query = query.join(fts, fts.c.rowid == Product.id).filter(fts_ref.op("MATCH")(match))
+        return query, func.bm25(fts_ref, *SQLITE_BM25_WEIGHTS).asc()
+
+    # Other backends: unindexed substring match on name and description
+    for term in terms:
+        pattern = f"%{term}%"
+        query = query.filter(or_(Product.name.ilike(pattern), Product.description.ilike(pattern)))
+    return query, None
@@ -0,0 +1,66 @@
+"""
+Background sweeper for expired rows
+"""
+import asyncio
+from datetime import datetime
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.idempotency import purge_expired_idempotency_keys
+from app.services.outbox import purge_processed_events
+from app.services.refresh_tokens import purge_expired_refresh_tokens
+from app.services.reservations import purge_expired_reservations
+from app.utils.background import BackgroundLoop
+
+
+class Sweeper(BackgroundLoop):
+    """
+    Every `interval` seconds deletes expired reservations, refresh tokens and
+    idempotency keys and processed outbox events past retention, in batches
+    """
+
+    def __init__(self, interval: float, batch_size: int, stop_timeout: float):
+        super().__init__(interval, stop_timeout)
+        self.batch_size = batch_size
+        self.runs = 0
+        self.failures = 0
+        self.reservations_purged = 0
+        self.refresh_tokens_purged = 0
+        self.idempotency_keys_purged = 0
+        self.outbox_events_purged = 0
+        self.last_run = None
+
+    async def sweep_once(self, stop: asyncio.Event = None):
+        async with AsyncSessionLocal() as db:
+            self.reservations_purged += await purge_expired_reservations(db, self.batch_size, stop)
+            self.refresh_tokens_purged += await purge_expired_refresh_tokens(db)
+            await db.commit()
+            if stop is None or not stop.is_set():
+                self.idempotency_keys_purged += await purge_expired_idempotency_keys(db, self.batch_size, stop)
+            if stop is None or not stop.is_set():
+                self.outbox_events_purged += await purge_processed_events(db, self.batch_size, stop)
+        self.runs += 1
+        self.last_run = datetime.utcnow()
+
+    async def run_once(self) -> bool:
+        await self.sweep_once(self._stopping)
+        return False
+
+    def on_error(self, exc: Exception):
+        self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "reservations_purged": self.reservations_purged,
+            "refresh_tokens_purged": self.refresh_tokens_purged,
+            "idempotency_keys_purged": self.idempotency_keys_purged,
+            "outbox_events_purged": self.outbox_events_purged,
+            "last_run": self.last_run,
+        }
+
+
+sweeper = Sweeper(
+    settings.SWEEPER_INTERVAL_SECONDS, settings.SWEEPER_BATCH_SIZE, settings.BACKGROUND_STOP_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,67 @@
+"""
+Background asyncio loop started and stopped with the app
+"""
+import asyncio
+
+
+class BackgroundLoop:
+    """
+    Calls run_once() until stopped, sleeping `interval` seconds (or until
+    woken) whenever it reports no more work. stop() lets the current
+    run_once() reach a batch boundary and cancels only after stop_timeout.
+    """
+
+    def __init__(self, interval: float, stop_timeout: float):
+        self.interval = interval
+        self.stop_timeout = stop_timeout
+        self._wakeup = None
+        self._stopping = None
+        self._task = None
+
+    async def run_once(self) -> bool:
+        """Do one unit of work; return True to run again without sleeping"""
+        raise NotImplementedError
+
+    def on_error(self, exc: Exception):
+        """Called when run_once() raises; the loop carries on"""
+
+    def notify(self):
+        """Run now instead of at the end of the current sleep"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                more = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.on_error(exc)
+                more = False
+            if not more and not self._stopping.is_set():
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        _, pending = await asyncio.wait({self._task}, timeout=self.stop_timeout)
+        if pending:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
@@ -0,0 +1,28 @@
+"""
+Dialect-portable SQLAlchemy helpers
+"""
+import asyncio
+from typing import Optional
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(db: AsyncSession):
+    """The session dialect's insert(), which supports ON CONFLICT on SQLite and PostgreSQL"""
+    return (sqlite if db.bind.dialect.name == "sqlite" else postgresql).insert
+
+
+async def purge_in_batches(
+    db: AsyncSession, model, where, batch_size: int, stop: Optional[asyncio.Event] = None
+) -> int:
+    """Delete model rows matching where batch_size at a time, committing each batch, until done or stop is set"""
+    purged = 0
+    while True:
+        batch = select(model.id).where(where).limit(batch_size)
+        result = await db.execute(delete(model).where(model.id.in_(batch.scalar_subquery())))
+        await db.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size or (stop is not None and stop.is_set()):
+            return purged
@@ -0,0 +1,51 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort: str, value, row_id: int) -> str:
+    """Encode the last row's sort key into an opaque cursor"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """Decode a cursor produced by encode_cursor, returning (value, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, row_id = payload["v"], int(payload["id"])
+        if payload["s"] != sort:
+            raise ValueError("cursor was issued for a different sort")
+        if sort == "created_at":
+            value = datetime.fromisoformat(value)
+        elif sort == "price" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError("price cursor must hold a number")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, row_id
+
+
+def apply_keyset(query, sort_column, id_column, cursor: str, sort: str):
+    """Seek past the row encoded in cursor on (sort_column, id_column)"""
+    value, row_id = decode_cursor(cursor, sort)
+    return query.filter(tuple_(sort_column, id_column) > tuple_(value, row_id))
+
+
+def next_cursor(rows, limit: int, sort: str):
+    """Return the cursor for the page after rows, or None on the last page"""
+    if limit <= 0 or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(sort, getattr(last, sort), last.id)
@@ -0,0 +1,49 @@
+"""
+SQL statement counter for catching N+1 query regressions
+
+Usage in tests:
+    with assert_max_queries(3):
+        client.get("/api/products")
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.database import async_engine
+
+
+class QueryCounter:
+    """Statements executed while the counter was attached"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Record every statement sent on engine (default: the request handlers' engine)"""
+    engine = engine or async_engine.sync_engine
+    counter = QueryCounter()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None):
+    """Fail if the block issues more than limit statements"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        executed = "\n".join(counter.statements)
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.count}:\n{executed}")
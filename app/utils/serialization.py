@@ -0,0 +1,72 @@
+"""
+JSON Response Serialization
+
+The default path mirrors FastAPI's own (pydantic models -> jsonable_encoder ->
+json.dumps). With FAST_JSON_RESPONSES enabled, ORM rows are validated by a
+precompiled TypeAdapter per schema and encoded with orjson, falling back to
+pydantic-core's encoder when orjson is not installed. Both paths produce the
+same bytes, so ETags do not change when the flag is flipped.
+"""
+import json
+from functools import lru_cache
+from typing import List
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema, many: bool) -> TypeAdapter:
+    return TypeAdapter(List[schema] if many else schema)
+
+
+def dump_json(content) -> bytes:
+    """Encode already-validated content (models, dicts, lists) the way JSONResponse does"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def dump_orm_json(schema, objects, fast: bool = None) -> bytes:
+    """Serialize one ORM object or a list of them through schema"""
+    many = isinstance(objects, (list, tuple))
+    if fast is None:
+        fast = settings.FAST_JSON_RESPONSES
+
+    if not fast:
+        if many:
+            return dump_json([schema.model_validate(obj) for obj in objects])
+        return dump_json(schema.model_validate(objects))
+
+    adapter = _adapter(schema, many)
+    validated = adapter.validate_python(objects, from_attributes=True)
+    if orjson is not None:
+        return orjson.dumps(adapter.dump_python(validated))
+    return adapter.dump_json(validated)
+
+
+def json_response(schema, objects, response: Response = None):
+    """
+    Return value for a list endpoint: encoded bytes on the fast path, otherwise
+    the objects themselves for FastAPI's response_model handling. Headers set on
+    the route's injected `response` are carried over to the fast-path response.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return objects
+    headers = dict(response.headers) if response is not None else None
+    return Response(
+        content=dump_orm_json(schema, objects, fast=True),
+        media_type="application/json",
+        headers=headers,
+    )
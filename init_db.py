@@ -7,9 +7,8 @@ from sqlalchemy.orm import Session
 from app.database import engine, Base, SessionLocal
 from app.models.user import User
 from app.models.product import Product, Category
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.passwords import pwd_context
+from app.services.search import ensure_search_index
 
 def create_tables():
     """Create all database tables"""
@@ -324,6 +323,7 @@ def main():
         create_admin_user(db)
         populate_categories(db)
         populate_products(db)
+        ensure_search_index(engine)
         
         print("\n" + "=" * 60)
         print("✓ Database initialization completed successfully!")
@@ -0,0 +1,80 @@
+# scripts/bench_concurrency.py
+"""
+Concurrent latency benchmark for the catalog endpoints.
+
+Fires a fixed number of requests at a running server with bounded concurrency
+and prints throughput and p50/p95/p99 latency. Run it against a build before
+and after a change (same DATABASE_URL, same worker count) to compare.
+Pass --vary-skip to give every request a distinct `skip` so the catalog cache
+cannot absorb the load and each request reaches the database. Requires httpx.
+
+Usage:
+ - Start the API: uvicorn app.main:app --workers 1
+ - Run: python scripts/bench_concurrency.py --url http://localhost:8000 --concurrency 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from bench_utils import percentile
+
+DEFAULT_PATHS = [
+    "/api/products?limit=100",
+    "/api/products?search=toy",
+    "/api/categories/",
+    "/api/products/1",
+]
+
+
+async def run(url, paths, total, concurrency, vary_skip):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        async def one(i):
+            nonlocal errors
+            path = paths[i % len(paths)]
+            if vary_skip:
+                path += ("&" if "?" in path else "?") + f"skip={i}"
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    print(f"requests={total} concurrency={concurrency} errors={errors}")
+    print(f"throughput={total / elapsed:.1f} req/s")
+    print(
+        f"latency ms: mean={statistics.mean(latencies):.1f} "
+        f"p50={percentile(latencies, 50):.1f} "
+        f"p95={percentile(latencies, 95):.1f} "
+        f"p99={percentile(latencies, 99):.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--path", action="append", dest="paths", help="repeatable; defaults to catalog reads")
+    parser.add_argument("--vary-skip", action="store_true", help="unique skip per request to bypass the cache")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+    if args.vary_skip:
+        paths = [path for path in paths if path.startswith("/api/products?")]
+    asyncio.run(run(args.url, paths, args.requests, args.concurrency, args.vary_skip))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# scripts/bench_serialization.py
+"""
+Microbenchmark: default vs fast JSON serialization of list responses.
+
+Builds in-memory ORM rows with the test factories (no database needed),
+serializes them through both paths in app/utils/serialization.py, checks
+the bytes are identical, and prints the time per page for each path.
+
+Usage:
+ - Run: python scripts/bench_serialization.py --rows 100 --iterations 500
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.schemas.cart import OrderResponse  # noqa: E402
+from app.schemas.product import ProductResponse  # noqa: E402
+from app.utils.serialization import dump_orm_json, orjson  # noqa: E402
+from tests.factories import make_orders, make_products  # noqa: E402
+
+
+def compare(label, schema, rows, iterations):
+    default_body = dump_orm_json(schema, rows, fast=False)
+    fast_body = dump_orm_json(schema, rows, fast=True)
+    assert default_body == fast_body, f"{label}: fast path output differs"
+
+    default_s = timeit.timeit(lambda: dump_orm_json(schema, rows, fast=False), number=iterations)
+    fast_s = timeit.timeit(lambda: dump_orm_json(schema, rows, fast=True), number=iterations)
+    print(
+        f"{label:<10} rows={len(rows):<5} bytes={len(default_body):<7} "
+        f"default={default_s / iterations * 1000:.3f} ms  "
+        f"fast={fast_s / iterations * 1000:.3f} ms  "
+        f"speedup={default_s / fast_s:.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if orjson else 'pydantic-core'}")
+    compare("products", ProductResponse, make_products(args.rows), args.iterations)
+    compare("orders", OrderResponse, make_orders(args.rows), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
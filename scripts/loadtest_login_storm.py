@@ -0,0 +1,92 @@
+# scripts/loadtest_login_storm.py
+"""
+Load test: API latency during a login storm.
+
+Measures GET latency on a database-backed endpoint twice, first on an idle
+server and then while a pool of clients hammers POST /api/auth/login. With
+password hashing off the event loop the two latency profiles should be
+close; 503s in the storm mean the password pool's queue limit is doing its
+job. The default probe (/api/categories/1) is not served from the catalog
+cache, so every probe waits on the event loop and the database.
+
+The storm comes from one IP, so the auth rate limiters must be off on the
+server under test (a rate of 0 disables them); otherwise nearly every login
+is a 429 that never reaches bcrypt, and the script stops with an error.
+
+Usage:
+ - Start the API: LOGIN_RATE_PER_IP_PER_MINUTE=0 LOGIN_RATE_PER_ACCOUNT_PER_MINUTE=0 uvicorn app.main:app --workers 1
+ - Run: python scripts/loadtest_login_storm.py --url http://localhost:8000 --logins 40 --duration 10
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+from bench_utils import percentile
+
+
+async def probe(client, path, duration):
+    """Sequential GET requests for duration seconds; returns latencies in ms"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def login_storm(client, email, password, stop, statuses):
+    while not stop.is_set():
+        response = await client.post("/api/auth/login", data={"username": email, "password": password})
+        statuses[response.status_code] += 1
+
+
+def report(label, latencies):
+    print(
+        f"{label:<12} n={len(latencies):<6} "
+        f"p50={percentile(latencies, 50):.1f} ms  "
+        f"p99={percentile(latencies, 99):.1f} ms  "
+        f"max={max(latencies):.1f} ms"
+    )
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        report("idle", await probe(client, args.path, args.duration))
+
+        stop = asyncio.Event()
+        statuses = Counter()
+        storm = [
+            asyncio.create_task(login_storm(client, args.email, args.password, stop, statuses))
+            for _ in range(args.logins)
+        ]
+        await asyncio.sleep(1)  # let the storm ramp up
+        report("login storm", await probe(client, args.path, args.duration))
+        stop.set()
+        await asyncio.gather(*storm)
+
+    print("login responses:", dict(statuses))
+    if statuses[429] > sum(statuses.values()) / 10:
+        raise SystemExit(
+            "Over 10% of logins were rate limited (429) and never ran bcrypt; restart the server with "
+            "LOGIN_RATE_PER_IP_PER_MINUTE=0 LOGIN_RATE_PER_ACCOUNT_PER_MINUTE=0"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/categories/1", help="uncached, database-backed GET to probe")
+    parser.add_argument("--logins", type=int, default=40, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per measurement phase")
+    parser.add_argument("--email", default="admin@digiaata.com")
+    parser.add_argument("--password", default="admin123")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
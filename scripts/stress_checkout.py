@@ -0,0 +1,134 @@
+# scripts/stress_checkout.py
+"""
+Stress test: concurrent checkouts against scarce stock.
+
+Seeds --shoppers users directly in the database, each with an address and a
+cart holding --quantity units of one product whose stock is set to --stock.
+It then fires every checkout at once at a running server. Afterwards it
+checks that no stock was oversold: the final stock is never negative, and
+the units sold add up to exactly what the order items record. It also
+prints how many orders per second were placed.
+
+The script writes to the same DATABASE_URL as the server (read from the
+environment / .env), so point both at a scratch database.
+
+Usage:
+ - Start the API: uvicorn app.main:app --workers 4
+ - Run: python scripts/stress_checkout.py --url http://localhost:8000 --shoppers 200 --stock 50 --quantity 1
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select, func
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal  # noqa: E402
+from app.models import User, Address, Product, CartItem, OrderItem  # noqa: E402
+from app.routers.auth import create_access_token, token_claims  # noqa: E402
+
+
+def seed(shoppers, stock, quantity, product_id):
+    """Reset the product's stock and give every shopper a one-line cart; returns bearer tokens"""
+    run_id = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        product = db.get(Product, product_id)
+        if product is None:
+            raise SystemExit(f"Product {product_id} not found; run init_db.py first")
+        product.stock_quantity = stock
+
+        users = [
+            User(
+                email=f"stress-{run_id}-{index}@example.com",
+                password_hash="!",  # never logs in; tokens are minted below
+                full_name=f"Stress Shopper {index}",
+            )
+            for index in range(shoppers)
+        ]
+        db.add_all(users)
+        db.flush()
+        db.add_all(Address(user_id=user.id, full_name=user.full_name, city="Test") for user in users)
+        db.add_all(CartItem(user_id=user.id, product_id=product_id, quantity=quantity) for user in users)
+        db.commit()
+
+        addresses = dict(db.execute(
+            select(Address.user_id, Address.id).where(Address.user_id.in_([user.id for user in users]))
+        ).all())
+        return [(create_access_token(token_claims(user)), addresses[user.id]) for user in users]
+    finally:
+        db.close()
+
+
+def sold_units(product_id, since_order_item_id):
+    db = SessionLocal()
+    try:
+        stock = db.get(Product, product_id).stock_quantity
+        sold = db.scalar(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0))
+            .where(OrderItem.product_id == product_id, OrderItem.id > since_order_item_id)
+        )
+        return stock, sold
+    finally:
+        db.close()
+
+
+async def checkout(client, token, address_id, statuses):
+    try:
+        response = await client.post(
+            "/api/orders/",
+            json={"shipping_address_id": address_id, "payment_method": "cod"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    except httpx.HTTPError:
+        statuses["error"] += 1
+        return
+    statuses[response.status_code] += 1
+
+
+async def run(args, shoppers):
+    statuses = Counter()
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(checkout(client, token, address_id, statuses) for token, address_id in shoppers))
+        elapsed = time.perf_counter() - start
+    return statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--shoppers", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=1, help="units in each shopper's cart")
+    parser.add_argument("--product-id", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=100, help="max open connections")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    last_order_item_id = db.scalar(select(func.coalesce(func.max(OrderItem.id), 0)))
+    db.close()
+
+    shoppers = seed(args.shoppers, args.stock, args.quantity, args.product_id)
+    statuses, elapsed = asyncio.run(run(args, shoppers))
+    stock, sold = sold_units(args.product_id, last_order_item_id)
+
+    placed = statuses[201]
+    print(f"checkouts: {dict(statuses)} in {elapsed:.2f}s ({placed / elapsed:.1f} orders/s)")
+    print(f"stock: {args.stock} -> {stock}, units sold: {sold}")
+    oversold = stock < 0 or sold != args.stock - stock or sold != placed * args.quantity
+    expected = min(args.shoppers, args.stock // args.quantity)
+    print("OVERSOLD" if oversold else "no overselling", f"({placed} of {expected} possible orders placed)")
+    sys.exit(1 if oversold else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Shared test fixtures
+
+Points the app at a throwaway SQLite database before anything imports
+app.config, seeds it with the init_db catalog, and hands out a TestClient
+plus admin and customer auth headers. The client is used without its
+context manager, so the sweeper and outbox worker never start and only
+the request under test touches the database.
+"""
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="digiaata-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["BCRYPT_ROUNDS"] = "4"
+# Every test request comes from one client IP; per-IP auth limits would trip across the suite
+os.environ["LOGIN_BURST_PER_IP"] = "1000"
+os.environ["REGISTER_BURST_PER_IP"] = "1000"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import init_db  # noqa: E402
+from app.main import app  # noqa: E402
+
+CUSTOMER_EMAIL = "customer@example.com"
+CUSTOMER_PASSWORD = "customer123"
+
+
+@pytest.fixture(scope="session")
+def client():
+    init_db.create_tables()
+    db = init_db.SessionLocal()
+    try:
+        init_db.create_admin_user(db)
+        init_db.populate_categories(db)
+        init_db.populate_products(db)
+    finally:
+        db.close()
+    init_db.ensure_search_index(init_db.engine)
+    return TestClient(app)
+
+
+def login(client, email, password) -> dict:
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return login(client, "admin@digiaata.com", "admin123")
+
+
+@pytest.fixture(scope="session")
+def customer_headers(client):
+    response = client.post(
+        "/api/auth/register",
+        json={"email": CUSTOMER_EMAIL, "password": CUSTOMER_PASSWORD, "full_name": "Test Customer"},
+    )
+    assert response.status_code == 201, response.text
+    return login(client, CUSTOMER_EMAIL, CUSTOMER_PASSWORD)
+
+
+@pytest.fixture(scope="session")
+def customer_orders(client, customer_headers):
+    """Three orders of two lines each, placed by the customer"""
+    order_ids = []
+    for first_product in (1, 3, 5):
+        response = client.post(
+            "/api/cart/items/bulk",
+            json={"items": [{"product_id": first_product, "quantity": 1}, {"product_id": first_product + 1, "quantity": 1}]},
+            headers=customer_headers,
+        )
+        assert response.status_code == 200, response.text
+        response = client.post(
+            "/api/orders/", json={"shipping_address_id": 1, "payment_method": "cod"}, headers=customer_headers,
+        )
+        assert response.status_code == 201, response.text
+        order_ids.append(response.json()["id"])
+    return order_ids
@@ -0,0 +1,38 @@
+"""
+In-memory ORM rows for serialization tests and benchmarks (no database needed)
+"""
+from datetime import datetime
+
+from app.models.cart import Order, OrderItem
+from app.models.product import Product, Category
+
+
+def make_products(count):
+    category = Category(
+        id=1, name="Pull & Push Toys", slug="pull-push",
+        description="Wooden toys on wheels", created_at=datetime(2025, 1, 1, 12, 30),
+    )
+    return [
+        Product(
+            id=i, name=f"Wooden Toy {i} – ÄÖ", description="Handcrafted wooden toy. " * 8,
+            price=250.5 + i, category_id=1, category=category, age_group="12 months+",
+            stock_quantity=20, image_url=None if i % 2 else f"/uploads/products/{i}.jpg",
+            is_active=True, created_at=datetime(2025, 1, 1, 12, 30, 15, 123456),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def make_orders(count, items_per_order=3):
+    return [
+        Order(
+            id=i, user_id=1, order_number=f"ORD{i:012d}", total_amount=1200.0,
+            status="pending", payment_status="pending", payment_method="cod",
+            shipping_address_id=1, created_at=datetime(2025, 1, 1, 12, 30),
+            order_items=[
+                OrderItem(id=i * 10 + j, order_id=i, product_id=j, quantity=1, price_at_purchase=400.0)
+                for j in range(items_per_order)
+            ],
+        )
+        for i in range(1, count + 1)
+    ]
@@ -0,0 +1,26 @@
+"""
+Background tasks stop at a batch boundary on shutdown instead of being cancelled
+"""
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.outbox import outbox_worker
+from app.services.sweeper import sweeper
+
+
+def test_sweeper_stops_without_cancellation(client):
+    for _ in range(3):
+        with TestClient(app) as lifecycle_client:
+            task = sweeper._task
+            assert lifecycle_client.get("/health").status_code == 200
+        assert task.done() and not task.cancelled()
+        assert sweeper._task is None
+
+
+def test_outbox_worker_stops_without_cancellation(client):
+    for _ in range(3):
+        with TestClient(app) as lifecycle_client:
+            task = outbox_worker._task
+            assert lifecycle_client.get("/health").status_code == 200
+        assert task.done() and not task.cancelled()
+        assert outbox_worker._task is None
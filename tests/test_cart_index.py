@@ -0,0 +1,36 @@
+"""
+Startup upgrade that adds the unique (user_id, product_id) cart index
+"""
+from sqlalchemy import create_engine, text
+
+from app.services.cart import ensure_cart_unique_index
+from app.utils.query_counter import count_queries
+
+
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE cart_items (id INTEGER PRIMARY KEY, user_id INTEGER, product_id INTEGER, "
+            "quantity INTEGER, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO cart_items (user_id, product_id, quantity) VALUES (1, 1, 2), (1, 1, 3), (1, 2, 1), (2, 1, 4)"
+        ))
+    return engine
+
+
+def test_folds_duplicates_then_creates_index(tmp_path):
+    engine = legacy_engine(tmp_path)
+    ensure_cart_unique_index(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT user_id, product_id, quantity FROM cart_items ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, 1, 5), (1, 2, 1), (2, 1, 4)]
+
+
+def test_noop_once_index_exists(tmp_path):
+    engine = legacy_engine(tmp_path)
+    ensure_cart_unique_index(engine)
+    with count_queries(engine) as queries:
+        ensure_cart_unique_index(engine)
+    assert not [sql for sql in queries.statements if sql.lstrip().upper().startswith(("UPDATE", "DELETE", "CREATE"))]
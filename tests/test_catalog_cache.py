@@ -0,0 +1,30 @@
+"""
+Catalog cache never stores a response read before a concurrent write
+"""
+from app.services.catalog_cache import catalog_cache, cache_key
+
+
+def test_put_after_invalidation_is_not_cached():
+    key = cache_key("test/stale")
+    version = catalog_cache.version
+    catalog_cache.invalidate("product:999")  # a write lands while the reader queries
+    entry = catalog_cache.put(key, {"rows": "old"}, tags={"product:999"}, version=version)
+    assert entry.body == b'{"rows":"old"}'
+    assert catalog_cache.get(key) is None
+
+
+def test_put_at_current_version_is_cached():
+    key = cache_key("test/fresh")
+    entry = catalog_cache.put(key, {"rows": "new"}, tags={"product:998"}, version=catalog_cache.version)
+    assert catalog_cache.get(key) == entry
+
+
+def test_listing_after_write_is_fresh(client, admin_headers):
+    catalog_cache.clear()
+    assert client.get("/api/products/7").headers["X-Cache"] == "MISS"
+    assert client.get("/api/products/7").headers["X-Cache"] == "HIT"
+    response = client.put("/api/products/7", json={"price": 999}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    response = client.get("/api/products/7")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["price"] == 999
@@ -0,0 +1,72 @@
+"""
+Concurrent checkouts of scarce stock never oversell
+"""
+import asyncio
+
+import httpx
+
+import init_db
+from app.main import app
+from app.models import User, Address, Product, CartItem
+from app.routers.auth import create_access_token, token_claims
+
+SHOPPERS = 30
+STOCK = 5
+
+
+def seed_shoppers(product_ids) -> list:
+    """SHOPPERS users, each with an address and one unit of every product in product_ids in their cart"""
+    db = init_db.SessionLocal()
+    try:
+        users = [
+            User(email=f"race-{index}@example.com", password_hash="!", full_name=f"Race Shopper {index}")
+            for index in range(SHOPPERS)
+        ]
+        db.add_all(users)
+        db.flush()
+        addresses = [Address(user_id=user.id, full_name=user.full_name, city="Test") for user in users]
+        db.add_all(addresses)
+        db.add_all(
+            CartItem(user_id=user.id, product_id=product_id, quantity=1) for user in users for product_id in product_ids
+        )
+        db.commit()
+        return [(create_access_token(token_claims(user)), address.id) for user, address in zip(users, addresses)]
+    finally:
+        db.close()
+
+
+async def checkout_all(shoppers) -> list:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = await asyncio.gather(*(
+            client.post(
+                "/api/orders/",
+                json={"shipping_address_id": address_id, "payment_method": "cod"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            for token, address_id in shoppers
+        ))
+    return [response.status_code for response in responses]
+
+
+def test_concurrent_checkouts_do_not_oversell(client):
+    db = init_db.SessionLocal()
+    try:
+        # Only the rattle is scarce; the blocks give every order the two lines other tests expect
+        scarce = Product(name="Race Condition Rattle", price=100.0, category_id=1, stock_quantity=STOCK)
+        plenty = Product(name="Race Condition Blocks", price=50.0, category_id=1, stock_quantity=SHOPPERS)
+        db.add_all([scarce, plenty])
+        db.commit()
+        product_id = scarce.id
+        product_ids = [scarce.id, plenty.id]
+    finally:
+        db.close()
+
+    statuses = asyncio.run(checkout_all(seed_shoppers(product_ids)))
+
+    assert statuses.count(201) == STOCK
+    assert statuses.count(409) == SHOPPERS - STOCK
+    db = init_db.SessionLocal()
+    try:
+        assert db.get(Product, product_id).stock_quantity == 0
+    finally:
+        db.close()
@@ -0,0 +1,28 @@
+"""
+SQLite connections wait for locks instead of failing
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_engine, engine
+
+BUSY_TIMEOUT_MS = int(settings.SQLITE_BUSY_TIMEOUT_SECONDS * 1000)
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(client):
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == BUSY_TIMEOUT_MS
+
+
+def test_async_sqlite_connections_use_wal_and_busy_timeout(client):
+    async def pragmas():
+        async with async_engine.connect() as conn:
+            return (
+                (await conn.execute(text("PRAGMA journal_mode"))).scalar(),
+                (await conn.execute(text("PRAGMA busy_timeout"))).scalar(),
+            )
+
+    assert asyncio.run(pragmas()) == ("wal", BUSY_TIMEOUT_MS)
@@ -0,0 +1,48 @@
+"""
+A deactivated account can neither log in nor keep refreshing its sessions
+"""
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.guest_cart import GUEST_CART_HEADER, encode_guest_cart
+
+PASSWORD = "inactive123"
+
+
+def register(client, email) -> dict:
+    response = client.post("/api/auth/register", json={"email": email, "password": PASSWORD, "full_name": "Inactive"})
+    assert response.status_code == 201, response.text
+    response = client.post("/api/auth/login", data={"username": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    tokens = response.json()
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}).json()
+    return {"user_id": me["id"], **tokens}
+
+
+def test_deactivated_user_cannot_login_or_refresh(client, admin_headers):
+    account = register(client, "deactivated@example.com")
+    response = client.post(f"/api/admin/users/{account['user_id']}/deactivate", headers=admin_headers)
+    assert response.status_code == 200
+
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "deactivated@example.com", "password": PASSWORD},
+        headers={GUEST_CART_HEADER: encode_guest_cart({1: 1})},
+    )
+    assert response.status_code == 403
+    assert "refresh_token" not in response.json()
+    response = client.post("/api/auth/refresh", json={"refresh_token": account["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_refresh_checks_is_active_itself(client):
+    # Deactivated without going through the admin endpoint, so no tokens were revoked
+    account = register(client, "flagged-inactive@example.com")
+    db = SessionLocal()
+    try:
+        db.get(User, account["user_id"]).is_active = False
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/api/auth/refresh", json={"refresh_token": account["refresh_token"]})
+    assert response.status_code == 401
@@ -0,0 +1,68 @@
+"""
+Guest cart merging is idempotent and hands back an empty token
+"""
+from app.services.guest_cart import GUEST_CART_HEADER, decode_guest_cart, encode_guest_cart
+from app.services.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER
+from tests.conftest import login
+
+
+def cart_quantities(client, headers) -> dict:
+    summary = client.get("/api/cart/summary", headers=headers).json()
+    return {item["product_id"]: item["quantity"] for item in summary["items"]}
+
+
+def test_replayed_token_is_merged_once(client):
+    email, password = "guest-merge@example.com", "guest12345"
+    response = client.post("/api/auth/register", json={"email": email, "password": password, "full_name": "Guest"})
+    assert response.status_code == 201, response.text
+    token = encode_guest_cart({7: 2, 8: 1})
+
+    response = client.post(
+        "/api/auth/login", data={"username": email, "password": password}, headers={GUEST_CART_HEADER: token},
+    )
+    assert response.status_code == 200, response.text
+    assert decode_guest_cart(response.headers[GUEST_CART_HEADER]) == {}
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert cart_quantities(client, headers) == {7: 2, 8: 1}
+
+    # Replaying the same token (stale client) changes nothing
+    response = client.post("/api/cart/merge", headers={**headers, GUEST_CART_HEADER: token})
+    assert response.status_code == 200, response.text
+    assert decode_guest_cart(response.headers[GUEST_CART_HEADER]) == {}
+    assert cart_quantities(client, headers) == {7: 2, 8: 1}
+
+    # A larger guest quantity raises the line to it; a smaller one leaves it
+    response = client.post(
+        "/api/cart/merge", headers={**headers, GUEST_CART_HEADER: encode_guest_cart({7: 3, 8: 1, 9: 1})},
+    )
+    assert response.status_code == 200, response.text
+    assert cart_quantities(client, headers) == {7: 3, 8: 1, 9: 1}
+
+
+def test_login_without_guest_cart_sends_no_token(client):
+    response = client.post("/api/auth/login", data={"username": "admin@digiaata.com", "password": "admin123"})
+    assert response.status_code == 200
+    assert GUEST_CART_HEADER not in response.headers
+
+
+def test_replayed_order_clears_guest_cart_again(client):
+    email, password = "guest-order@example.com", "guest12345"
+    response = client.post("/api/auth/register", json={"email": email, "password": password, "full_name": "Guest"})
+    assert response.status_code == 201, response.text
+    headers = {
+        **login(client, email, password),
+        GUEST_CART_HEADER: encode_guest_cart({10: 1, 11: 1}),
+        IDEMPOTENCY_HEADER: "guest-order-1",
+    }
+    order = {"shipping_address_id": 1, "payment_method": "cod"}
+
+    first = client.post("/api/orders/", json=order, headers=headers)
+    assert first.status_code == 201, first.text
+    assert decode_guest_cart(first.headers[GUEST_CART_HEADER]) == {}
+
+    # The client lost the first response, so it still holds the guest cart and retries
+    retry = client.post("/api/orders/", json=order, headers=headers)
+    assert retry.status_code == 201, retry.text
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+    assert decode_guest_cart(retry.headers[GUEST_CART_HEADER]) == {}
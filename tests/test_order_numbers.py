@@ -0,0 +1,80 @@
+"""
+Order number generators: uniqueness at volume, format, and configuration
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from app.config import Settings, settings
+from app.services import order_numbers
+from app.services.order_numbers import PREFIX, RandomOrderNumbers, SnowflakeOrderNumbers, build_generator
+
+PER_PROCESS = 1_000_000
+THREADS = 4
+
+
+def snowflake_ids(host_id: int) -> list:
+    """Worker process: PER_PROCESS raw ids from one generator shared by THREADS threads"""
+    generator = SnowflakeOrderNumbers(host_id)
+
+    def batch(_):
+        return [generator.next_id() for _ in range(PER_PROCESS // THREADS)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return [number for numbers in pool.map(batch, range(THREADS)) for number in numbers]
+
+
+def test_snowflake_millions_without_collision():
+    # Two processes on two hosts, each generating from four threads at once
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(snowflake_ids, [1, 2]))
+    ids = [number for numbers in results for number in numbers]
+    assert len(ids) == 2 * PER_PROCESS
+    assert len(set(ids)) == len(ids)
+
+
+def test_replicas_with_same_pid_differ_by_host(monkeypatch):
+    # Containers typically all run as pid 1; only the host id separates them
+    monkeypatch.setattr(order_numbers.os, "getpid", lambda: 1)
+    first, second = SnowflakeOrderNumbers(1), SnowflakeOrderNumbers(2)
+    numbers = [generator() for _ in range(50_000) for generator in (first, second)]
+    assert len(set(numbers)) == len(numbers)
+
+    first, second = SnowflakeOrderNumbers(0), SnowflakeOrderNumbers(0)
+    numbers = [generator() for _ in range(1_000) for generator in (first, second)]
+    assert len(set(numbers)) < len(numbers)
+
+
+def test_random_many_without_collision():
+    generator = RandomOrderNumbers()
+    numbers = [generator() for _ in range(200_000)]
+    assert len(set(numbers)) == len(numbers)
+
+
+@pytest.mark.parametrize("generator", [SnowflakeOrderNumbers(5), RandomOrderNumbers()])
+def test_format(generator):
+    numbers = [generator() for _ in range(1_000)]
+    assert all(number.startswith(PREFIX) and number[len(PREFIX):].isalnum() for number in numbers)
+    assert len({len(number) for number in numbers}) == 1
+    assert all(len(number) <= 50 for number in numbers)
+
+
+def test_snowflake_numbers_sort_by_creation():
+    generator = SnowflakeOrderNumbers(3)
+    numbers = [generator() for _ in range(10_000)]
+    assert numbers == sorted(numbers)
+
+
+def test_snowflake_requires_explicit_host_id(monkeypatch):
+    monkeypatch.setattr(settings, "ORDER_NUMBER_HOST_ID", None)
+    with pytest.raises(ValueError, match="ORDER_NUMBER_HOST_ID"):
+        build_generator("snowflake")
+    monkeypatch.setattr(settings, "ORDER_NUMBER_HOST_ID", 7)
+    assert build_generator("snowflake").host_id == 7
+    with pytest.raises(ValueError):
+        SnowflakeOrderNumbers(1024)
+
+
+def test_default_generator_needs_no_configuration():
+    assert Settings.model_fields["ORDER_NUMBER_GENERATOR"].default == "random"
+    assert isinstance(build_generator("random"), RandomOrderNumbers)
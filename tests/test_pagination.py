@@ -0,0 +1,42 @@
+"""
+Cursor decoding: forged or mismatched cursors are a 400, never a 500
+"""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def forge(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    created = datetime(2025, 1, 2, 3, 4, 5)
+    assert decode_cursor(encode_cursor("created_at", created, 7), "created_at") == (created, 7)
+    assert decode_cursor(encode_cursor("price", 850.0, 3), "price") == (850.0, 3)
+
+
+@pytest.mark.parametrize("cursor, sort", [
+    ("not-base64!", "created_at"),
+    (forge({"s": "created_at", "v": 123, "id": 1}), "created_at"),
+    (forge({"s": "created_at", "v": "notadate", "id": 1}), "created_at"),
+    (forge({"s": "price", "v": "cheap", "id": 1}), "price"),
+    (forge({"s": "price", "v": True, "id": 1}), "price"),
+    (forge({"s": "price", "v": 10, "id": "x"}), "price"),
+    (forge({"s": "price", "v": 10, "id": 1}), "created_at"),
+    (forge(["s", "v"]), "price"),
+])
+def test_invalid_cursor_is_400(cursor, sort):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor, sort)
+    assert excinfo.value.status_code == 400
+
+
+def test_forged_cursor_on_endpoint(client):
+    cursor = forge({"s": "created_at", "v": 123, "id": 1})
+    assert client.get(f"/api/products/?cursor={cursor}").status_code == 400
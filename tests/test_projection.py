@@ -0,0 +1,29 @@
+"""
+Sparse fieldsets: trimmed responses, and an OpenAPI schema that describes them
+"""
+import pytest
+
+from app.main import app
+from app.services.catalog_cache import catalog_cache
+
+
+@pytest.mark.parametrize("path", ["/api/products/", "/api/categories/1/products"])
+def test_fields_trims_response(client, path):
+    catalog_cache.clear()
+    response = client.get(path, params={"fields": "id,name,price"})
+    assert response.status_code == 200
+    assert response.json()
+    assert all(set(product) == {"id", "name", "price"} for product in response.json())
+
+
+@pytest.mark.parametrize("path", ["/api/products/", "/api/categories/{category_id}/products"])
+def test_openapi_describes_sparse_response(path):
+    operation = app.openapi()["paths"][path]["get"]
+    schema = operation["responses"]["200"]["content"]["application/json"]["schema"]
+    refs = {variant["items"]["$ref"].rsplit("/", 1)[-1] for variant in schema["anyOf"]}
+    assert refs == {"ProductResponse", "ProductFieldsResponse"}
+
+    sparse = app.openapi()["components"]["schemas"]["ProductFieldsResponse"]
+    assert not sparse.get("required")
+    fields_param = next(param for param in operation["parameters"] if param["name"] == "fields")
+    assert "ProductFieldsResponse" in fields_param["description"]
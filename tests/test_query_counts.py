@@ -0,0 +1,53 @@
+"""
+Per-request statement budgets for the list endpoints (N+1 guard)
+
+Each endpoint returns several rows with related data; the budget is the
+number of statements it takes with eager loading, independent of row count.
+"""
+import pytest
+
+from app.services.catalog_cache import catalog_cache
+from app.utils.query_counter import assert_max_queries
+
+
+@pytest.fixture(autouse=True)
+def cold_catalog_cache():
+    # Cached catalog responses would skip the database entirely
+    catalog_cache.clear()
+
+
+def test_product_listing(client):
+    # products + selectinload(category)
+    with assert_max_queries(2):
+        response = client.get("/api/products/?limit=20")
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+    assert all(product["category"] for product in response.json())
+
+
+def test_category_products(client):
+    # category + products + selectinload(category)
+    with assert_max_queries(3):
+        response = client.get("/api/categories/1/products")
+    assert response.status_code == 200
+    assert len(response.json()) > 1
+
+
+def test_user_orders(client, customer_headers, customer_orders):
+    client.get("/api/auth/me", headers=customer_headers)  # resolve the principal outside the budget
+    # orders + selectinload(order_items)
+    with assert_max_queries(2):
+        response = client.get("/api/orders/", headers=customer_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == len(customer_orders)
+    assert all(len(order["order_items"]) == 2 for order in response.json())
+
+
+def test_admin_orders(client, admin_headers, customer_orders):
+    client.get("/api/auth/me", headers=admin_headers)
+    # orders + selectinload(order_items)
+    with assert_max_queries(2):
+        response = client.get("/api/admin/orders", headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.json()) >= len(customer_orders)
+    assert all(len(order["order_items"]) == 2 for order in response.json())
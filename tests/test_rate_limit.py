@@ -0,0 +1,26 @@
+"""
+Token-bucket limiter configuration edge cases
+"""
+import pytest
+
+from app.services.rate_limit import TokenBucketLimiter
+
+
+def test_bucket_runs_dry_after_burst():
+    limiter = TokenBucketLimiter(per_minute=60, burst=2, max_keys=10)
+    assert limiter.acquire("ip") == 0
+    assert limiter.acquire("ip") == 0
+    assert limiter.acquire("ip") > 0
+    assert limiter.acquire("other-ip") == 0
+
+
+def test_zero_rate_disables_limiter():
+    limiter = TokenBucketLimiter(per_minute=0, burst=0, max_keys=10)
+    assert not limiter.enabled
+    assert all(limiter.acquire("ip") == 0 for _ in range(100))
+
+
+@pytest.mark.parametrize("per_minute, burst", [(-1, 5), (10, 0)])
+def test_invalid_settings_rejected(per_minute, burst):
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(per_minute=per_minute, burst=burst, max_keys=10)
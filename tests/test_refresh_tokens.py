@@ -0,0 +1,36 @@
+"""
+Refresh token rotation keeps a sliding expiry under an absolute session cap
+"""
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+from app.config import settings
+from app.services.refresh_tokens import refresh_expiry
+from tests.conftest import CUSTOMER_EMAIL, CUSTOMER_PASSWORD
+
+
+def claims(token: str) -> dict:
+    return jwt.get_unverified_claims(token)
+
+
+def test_expiry_slides_until_the_cap():
+    now = datetime(2025, 6, 1)
+    assert refresh_expiry(now, now) == now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    started = now - timedelta(days=settings.REFRESH_TOKEN_MAX_LIFETIME_DAYS - 1)
+    assert refresh_expiry(started, now) == now + timedelta(days=1)
+    started = now - timedelta(days=settings.REFRESH_TOKEN_MAX_LIFETIME_DAYS)
+    assert refresh_expiry(started, now) <= now
+
+
+def test_rotation_keeps_family_start(client, customer_headers, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_MAX_LIFETIME_DAYS", 1)
+    response = client.post("/api/auth/login", data={"username": CUSTOMER_EMAIL, "password": CUSTOMER_PASSWORD})
+    first = response.json()["refresh_token"]
+    for _ in range(3):
+        response = client.post("/api/auth/refresh", json={"refresh_token": response.json()["refresh_token"]})
+        assert response.status_code == 200, response.text
+    latest = claims(response.json()["refresh_token"])
+
+    assert latest["fst"] == claims(first)["fst"]
+    assert latest["exp"] <= latest["fst"] + 86400
@@ -0,0 +1,17 @@
+"""
+Product search filtering
+"""
+import pytest
+
+
+def test_search_matches_terms(client):
+    response = client.get("/api/products/?search=balancing")
+    assert response.status_code == 200
+    assert any("Balancing" in product["name"] for product in response.json())
+
+
+@pytest.mark.parametrize("search", ['""', "!!!", "- * -"])
+def test_search_without_terms_matches_nothing(client, search):
+    response = client.get("/api/products/", params={"search": search})
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,44 @@
+"""
+Fast vs default JSON serialization: identical bytes, identical OpenAPI
+(speed is measured by scripts/bench_serialization.py)
+"""
+import pytest
+
+from app.config import settings
+from app.main import app
+from app.schemas.cart import OrderResponse
+from app.schemas.product import ProductResponse
+from app.services.catalog_cache import catalog_cache
+from app.utils.serialization import dump_orm_json
+from tests.factories import make_orders, make_products
+
+
+CASES = [
+    ("products", ProductResponse, make_products),
+    ("orders", OrderResponse, make_orders),
+]
+
+
+@pytest.mark.parametrize("label, schema, make_rows", CASES)
+def test_fast_path_bytes_match(label, schema, make_rows):
+    rows = make_rows(50)
+    assert dump_orm_json(schema, rows, fast=True) == dump_orm_json(schema, rows, fast=False)
+    assert dump_orm_json(schema, rows[0], fast=True) == dump_orm_json(schema, rows[0], fast=False)
+
+
+def test_openapi_unchanged_by_flag(monkeypatch):
+    monkeypatch.setattr(app, "openapi_schema", None)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    default_schema = app.openapi()
+    app.openapi_schema = None
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    assert app.openapi() == default_schema
+
+
+def test_listing_bytes_unchanged_by_flag(client, monkeypatch):
+    bodies = []
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast)
+        catalog_cache.clear()
+        bodies.append(client.get("/api/products/?limit=50").content)
+    assert bodies[0] == bodies[1]